@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Collapse duplicate feedback rows so the app can make feedback.chat_history_id unique.
+
+Keeps the newest feedback per chat and deletes the rest. Run once, with the app stopped,
+when startup reports duplicate feedback rows.
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from sqlalchemy import inspect
+
+from src.app.database.database import engine
+from src.app.models.database_models import Feedback
+from src.app.services.feedback_service import dedupe_feedback, ensure_feedback_unique_index
+
+def main():
+    if not inspect(engine).has_table(Feedback.__tablename__):
+        print("ℹ️  No feedback table yet, nothing to deduplicate")
+        return
+    
+    removed = dedupe_feedback(engine)
+    print(f"🧹 Removed {removed} duplicate feedback rows (kept the newest per chat)")
+    
+    ensure_feedback_unique_index(engine)
+    print("✅ feedback.chat_history_id is unique")
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,8 @@ source venv_bankbot/bin/activate
 # Install dependencies
 echo "Installing dependencies..."
 pip install --upgrade pip
-pip install -r requirements.txt
+pip install -r requirements.txt || { echo "❌ Failed to install dependencies"; exit 1; }
+pip install -e . || { echo "❌ Failed to install the banking bot package"; exit 1; }
 
 # Create .env file if it doesn't exist
 if [ ! -f ".env" ]; then
@@ -58,9 +59,9 @@ echo "✅ Setup completed!"
 echo ""
 echo "📋 Next steps:"
 echo "1. Edit .env file and add your OpenAI API key"
-echo "2. Start the main API: python src/app/main.py"
+echo "2. Start the main API: ./start_banking_bot.sh (or: uvicorn src.app.main:app --host 0.0.0.0 --port 2024)"
 echo "3. Start the ingestion API: python src/ingestion_app/ingestion_main.py"
-echo "4. Visit http://localhost:8000/docs for API documentation"
+echo "4. Visit http://localhost:2024/docs for API documentation"
 echo ""
 echo "🧪 Test users created:"
 echo "- john_doe (password: password123)"
@@ -91,6 +91,11 @@ if [ $? -ne 0 ]; then
     print_error "Failed to install dependencies"
     exit 1
 fi
+# Checked inline because set -e would otherwise exit before the error message
+if ! pip install -e .; then
+    print_error "Failed to install the banking bot package"
+    exit 1
+fi
 print_success "All Python dependencies installed"
 
 # Step 3: Set up environment variables
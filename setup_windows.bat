@@ -69,6 +69,12 @@ if %errorlevel% neq 0 (
     pause
     exit /b 1
 )
+python -m pip install -e .
+if %errorlevel% neq 0 (
+    echo [ERROR] Failed to install the banking bot package
+    pause
+    exit /b 1
+)
 echo [SUCCESS] All Python dependencies installed
 
 REM Step 3: Set up environment variables
@@ -3,24 +3,26 @@ from langchain.agents import create_agent
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, AIMessage
 from langgraph.checkpoint.memory import InMemorySaver
+import asyncio
+import copy
 import json
 import logging
+import threading
 from datetime import datetime
 
-# Setup project path for consistent imports
-import sys
-from pathlib import Path
-PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
-sys.path.insert(0, str(PROJECT_ROOT))
-
 from src.app.config.service_config import settings
+from src.app.models.agent_models import Message
 from src.app.tools.sql_retrieval_tool import get_account_balance, get_transactions, get_credit_card_info
 from src.app.tools.doc_retrieval_tool import search_bank_documents
 from src.app.utils.logger_utils import get_logger
 from src.app.utils.prompts import get_banking_agent_prompt
+from src.app.utils.time_utils import iso_now
 
 logger = get_logger(__name__)
 
+# LangChain message types -> Message roles
+_MESSAGE_ROLES = {"human": "user", "ai": "assistant", "system": "system", "tool": "tool"}
+
 
 class BankingAgent:
     """Enterprise-grade banking agent with proper message-type based ReAct streaming"""
@@ -54,7 +56,7 @@ class BankingAgent:
             "type": "stream_start",
             "user_id": user_id,
             "chat_thread_id": thread_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
         
         # Reset state for new conversation turn
@@ -87,13 +89,13 @@ class BankingAgent:
             yield {
                 "type": "error",
                 "content": f"Error: {str(e)}",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": iso_now()
             }
         
         # Stream completion
         yield {
             "type": "stream_complete",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
         
         yield {
@@ -101,7 +103,39 @@ class BankingAgent:
             "chat_thread_id": thread_id,
             "tools_used": len([t for t in self.tools]),
             "response_length": 0,  # Will be filled by frontend
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
+        }
+
+    async def chat_batch(self, requests: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Run independent chat turns concurrently and collect each one's final answer.
+        
+        Each request holds message, user_id and chat_thread_id. Turns run on shallow copies of
+        the agent so they share the model, tools and checkpointer but not the per-turn ReAct state.
+        """
+        return list(await asyncio.gather(
+            *(copy.copy(self).collect_response(**request) for request in requests)
+        ))
+
+    async def collect_response(self, message: str, user_id: str, chat_thread_id: str) -> Dict[str, Any]:
+        """Run one chat turn and return its final answer and the tools that were executed.
+        
+        Turns on one instance share the ReAct step state, so run concurrent turns with chat_batch.
+        """
+        response = ""
+        tools_used = []
+        async for event in self.stream_response(message, chat_thread_id, user_id):
+            if event["type"] == "error":
+                response = event["content"]
+            elif event["type"] == "react_step" and event["phase"] == "ACTION":
+                tools_used.append(event["details"]["tool_name"])
+            elif event["type"] == "react_step" and event["phase"] == "FINAL_ANSWER":
+                response = event["details"]["final_answer"]
+        
+        return {
+            "response": response,
+            "tools_used": tools_used,
+            "user_id": user_id,
+            "chat_thread_id": chat_thread_id
         }
 
     async def _parse_langgraph_event(self, event: Dict[str, Any], thread_id: str, user_id: str) -> Optional[Dict[str, Any]]:
@@ -132,7 +166,7 @@ class BankingAgent:
                     "full_thought": "Starting analysis of user request"
                 },
                 "user_id": user_id,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": iso_now()
             }
         
         # === 2. LLM STREAM - Reasoning tokens ===
@@ -151,7 +185,7 @@ class BankingAgent:
                     "content": content,
                     "step": self.current_step,
                     "user_id": user_id,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": iso_now()
                 }
         
         # === 3. LLM END - Reasoning complete, check for tool calls ===
@@ -178,7 +212,7 @@ class BankingAgent:
                         "tool_call_id": tool_id
                     },
                     "user_id": user_id,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": iso_now()
                 }
             
             # For final responses without tool calls, just show thinking phase
@@ -194,7 +228,7 @@ class BankingAgent:
                         "has_tool_calls": False
                     },
                     "user_id": user_id,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": iso_now()
                 }
         
         # === 4. TOOL START - Tool execution begins ===
@@ -226,7 +260,7 @@ class BankingAgent:
                     "execution_start": True
                 },
                 "user_id": user_id,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": iso_now()
             }
         
         # === 5. TOOL END - Tool execution complete ===
@@ -263,7 +297,7 @@ class BankingAgent:
                     "execution_complete": True
                 },
                 "user_id": user_id,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": iso_now()
             }
         
         # === 6. CHAIN END - Final response ready (ONLY ONCE) ===
@@ -304,7 +338,7 @@ class BankingAgent:
                                     "answer_length": len(content)
                                 },
                                 "user_id": user_id,
-                                "timestamp": datetime.now().isoformat()
+                                "timestamp": iso_now()
                             }
                         break
         
@@ -344,26 +378,45 @@ class BankingAgent:
             preview = str(tool_output)[:100]
             return f"Retrieved: {preview}{'...' if len(str(tool_output)) > 100 else ''}"
 
-    def get_conversation_history(self, user_id: str, thread_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    async def record_turn(self, message: str, response: str, thread_id: str, user_id: str):
+        """Append a user message and its answer to the thread's history without running the agent.
+        
+        Used when an answer is served from the response cache, so later turns still see the exchange.
+        The answer is written as the model node's output, which ends the turn like a final answer does.
+        """
+        config = {"configurable": {"thread_id": f"{thread_id}_{user_id}"}}
+        await self.agent.aupdate_state(
+            config,
+            {
+                "messages": [
+                    HumanMessage(content=f"[AUTHENTICATED_USER_ID: {user_id}] {message}"),
+                    AIMessage(content=response)
+                ]
+            },
+            as_node="model"
+        )
+
+    def get_conversation_history(self, user_id: str, thread_id: str, limit: int = 50) -> List[Message]:
         """Get conversation history from the agent's checkpointer"""
         try:
             config = {"configurable": {"thread_id": f"{thread_id}_{user_id}"}}
             
             # Get the current state from checkpointer
-            state = self.agent.checkpointer.get(config)
+            state = self.agent.get_state(config)
             if state and "messages" in state.values:
                 messages = state.values["messages"]
                 
-                # Convert to simple format for logging/debugging
+                # Checkpointer messages are already trusted, so build without re-validating
                 history = []
+                now = datetime.now()
                 for msg in messages[-limit:]:  # Get last N messages
                     if hasattr(msg, 'content') and msg.content:
-                        msg_type = "human" if hasattr(msg, 'type') and msg.type == "human" else "ai"
-                        history.append({
-                            "type": msg_type,
-                            "content": str(msg.content),
-                            "timestamp": getattr(msg, 'timestamp', datetime.now().isoformat())
-                        })
+                        msg_type = getattr(msg, 'type', None)
+                        history.append(Message.model_construct(
+                            role=_MESSAGE_ROLES.get(msg_type, "assistant"),
+                            content=str(msg.content),
+                            timestamp=getattr(msg, 'timestamp', now)
+                        ))
                 
                 logger.info(f"Retrieved {len(history)} messages for user {user_id}, thread {thread_id}")
                 return history
@@ -376,10 +429,13 @@ class BankingAgent:
 
 # Global shared agent instance
 _agent_instance = None
+_agent_lock = threading.Lock()  # sync endpoints call this from the threadpool
 
 def get_banking_agent(user_id: str) -> BankingAgent:
     """Get the shared banking agent instance (user isolation handled by thread_id)"""
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = BankingAgent()
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = BankingAgent()
     return _agent_instance
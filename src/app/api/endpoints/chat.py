@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import json
 from datetime import datetime
 
-from ...database.database import get_db
+import orjson
+
+from ...database.database import get_async_db
 from ...models.api_models import ChatMessage, ChatResponse, ChatHistoryResponse
 from ...services.chat_service import chat_service
 from ...utils.auth_utils import AuthService
@@ -16,13 +17,15 @@ logger = get_logger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Upper bound on rows returned by one history export request
+EXPORT_MAX_ROWS = 5000
 
 
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     message: ChatMessage,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Send a message to the banking agent and get a response"""
     try:
@@ -39,7 +42,7 @@ async def send_message(
 async def stream_message(
     message: ChatMessage,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Stream a response from the banking agent in real-time using LangGraph's native streaming"""
     try:
@@ -47,16 +50,16 @@ async def stream_message(
             """Generator function for streaming response"""
             try:
                 async for chunk in chat_service.stream_message(message, current_user, db):
-                    # Convert chunk to JSON and add newline for SSE format
-                    yield f"data: {json.dumps(chunk)}\n\n"
+                    # Convert chunk to JSON bytes and add newline for SSE format
+                    yield b"data: " + orjson.dumps(chunk) + b"\n\n"
             except Exception as e:
                 logger.error(f"Error in stream generator: {str(e)}")
                 error_chunk = {
                     "type": "error",
                     "message": f"Streaming error: {str(e)}",
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": datetime.now()
                 }
-                yield f"data: {json.dumps(error_chunk)}\n\n"
+                yield b"data: " + orjson.dumps(error_chunk) + b"\n\n"
         
         return StreamingResponse(
             generate_stream(),
@@ -79,7 +82,7 @@ async def get_chat_history(
     chat_thread_id: Optional[str] = None,
     limit: int = 50,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get chat history for the current user"""
     try:
@@ -89,7 +92,7 @@ async def get_chat_history(
                 detail="Limit cannot exceed 100"
             )
         
-        history = chat_service.get_chat_history(current_user, chat_thread_id, limit, db)
+        history = await chat_service.get_chat_history(current_user, chat_thread_id, limit, db)
         return history
     except Exception as e:
         logger.error(f"Error retrieving chat history: {str(e)}")
@@ -98,14 +101,49 @@ async def get_chat_history(
             detail=f"Failed to retrieve chat history: {str(e)}"
         )
 
+@router.get("/history/export")
+async def export_chat_history(
+    chat_thread_id: Optional[str] = None,
+    limit: int = EXPORT_MAX_ROWS,
+    offset: int = 0,
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export the current user's chat history as NDJSON, newest first, streamed in batches.
+    
+    At most EXPORT_MAX_ROWS rows per request; page with offset until fewer than limit rows come back.
+    If the export fails after streaming has started, the last line is an error object instead of a row.
+    """
+    if not 1 <= limit <= EXPORT_MAX_ROWS or offset < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Limit must be between 1 and {EXPORT_MAX_ROWS} and offset cannot be negative"
+        )
+    
+    async def generate_ndjson():
+        """Generator function for the NDJSON export"""
+        try:
+            async for chat in chat_service.iter_chat_history(current_user, chat_thread_id, limit, db, offset=offset):
+                yield orjson.dumps(chat.model_dump()) + b"\n"
+        except Exception as e:
+            # The 200 status is already sent, so mark the file as incomplete in-band
+            logger.error(f"Error exporting chat history: {str(e)}")
+            yield orjson.dumps({
+                "type": "error",
+                "message": f"Export failed: {str(e)}",
+                "timestamp": datetime.now()
+            }) + b"\n"
+    
+    return StreamingResponse(generate_ndjson(), media_type="application/x-ndjson")
+
 @router.get("/threads")
 async def get_user_threads(
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all chat threads for the current user"""
     try:
-        threads = chat_service.get_user_threads(current_user, db)
+        threads = await chat_service.get_user_threads(current_user, db)
         return {"threads": threads}
     except Exception as e:
         logger.error(f"Error retrieving user threads: {str(e)}")
@@ -118,11 +156,11 @@ async def get_user_threads(
 async def delete_thread(
     thread_id: str,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a specific chat thread for the current user"""
     try:
-        success = chat_service.delete_thread(current_user, thread_id, db)
+        success = await chat_service.delete_thread(current_user, thread_id, db)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -141,11 +179,11 @@ async def delete_thread(
 @router.delete("/threads")
 async def delete_all_threads(
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete all chat threads for the current user"""
     try:
-        count = chat_service.delete_all_threads(current_user, db)
+        count = await chat_service.delete_all_threads(current_user, db)
         return {"message": f"Deleted {count} threads successfully", "deleted_count": count}
     except Exception as e:
         logger.error(f"Error deleting all threads: {str(e)}")
@@ -4,9 +4,8 @@ from sqlalchemy import text
 from datetime import datetime
 
 from ...database.database import get_db, engine
+from ...database.chromadb_client import CHROMADB_PATH, get_chroma_client
 from ...models.api_models import HealthResponse
-import chromadb
-from pathlib import Path
 from ...config.service_config import settings
 from ...utils.logger_utils import get_logger
 
@@ -27,10 +26,7 @@ async def health_check(db: Session = Depends(get_db)):
     
     # Test ChromaDB connection
     try:
-        PROJECT_ROOT = Path(__file__).parents[4]
-        client = chromadb.PersistentClient(
-            path=str(PROJECT_ROOT / "data" / "chromadb")
-        )
+        client = get_chroma_client()
         
         # Try to get the collection, create if it doesn't exist
         try:
@@ -107,10 +103,7 @@ async def database_health(db: Session = Depends(get_db)):
 async def chromadb_health():
     """Detailed ChromaDB health check"""
     try:
-        PROJECT_ROOT = Path(__file__).parents[4]
-        client = chromadb.PersistentClient(
-            path=str(PROJECT_ROOT / "data" / "chromadb")
-        )
+        client = get_chroma_client()
         
         # List all collections first
         collections = client.list_collections()
@@ -122,7 +115,7 @@ async def chromadb_health():
                 "timestamp": datetime.now(),
                 "error": "No collections found",
                 "available_collections": collection_names,
-                "chromadb_path": str(PROJECT_ROOT / "data" / "chromadb")
+                "chromadb_path": str(CHROMADB_PATH)
             }
         
         # Use the first available collection
@@ -149,7 +142,7 @@ async def chromadb_health():
             "can_query": can_query,
             "query_error": query_error,
             "available_collections": collection_names,
-            "chromadb_path": str(PROJECT_ROOT / "data" / "chromadb")
+            "chromadb_path": str(CHROMADB_PATH)
         }
     except Exception as e:
         logger.error(f"ChromaDB detailed health check failed: {str(e)}")
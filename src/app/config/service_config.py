@@ -11,6 +11,8 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./data/banking_bot.db"
+    db_pool_size: int = 20  # ignored for SQLite, which does not pool connections
+    db_max_overflow: int = 40
     
     # OpenAI
     openai_api_key: str = ""
@@ -36,10 +38,21 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     log_file: str = "./logs/banking_bot.log"
     
-    # Rate limiting
+    # Response cache (answers that used live account data are never cached)
+    response_cache_ttl: int = 3600  # seconds
+    response_cache_max_entries: int = 1024
+    semantic_cache_threshold: Optional[float] = 0.1  # max cosine distance for paraphrase hits; None disables
+    response_cache_min_score: int = 4  # judge overall_score (1-5) an answer needs before it is replayed
+    
+    # Rate limiting (per user)
     rate_limit_requests: int = 100
     rate_limit_window: int = 60  # seconds
     
+    # LLM provider quotas, split evenly across worker processes
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 30000
+    llm_workers: int = 1
+    
     # File upload
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     allowed_file_types: list = ["pdf", "docx", "txt"]
@@ -53,6 +66,10 @@ class Settings(BaseSettings):
         "http://127.0.0.1:8080",
         "http://127.0.0.1:2024",
     ]
+    # Explicit lists (no wildcards) so preflight responses can be cached
+    allowed_methods: list = ["GET", "POST", "DELETE", "OPTIONS"]  # DELETE is used by /chat/threads
+    allowed_headers: list = ["Authorization", "Content-Type", "X-Request-ID"]
+    cors_max_age: int = 86400  # seconds browsers may cache a preflight response
     
     model_config = ConfigDict(
         env_file=".env",
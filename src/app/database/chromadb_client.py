@@ -0,0 +1,13 @@
+from functools import lru_cache
+
+import chromadb
+
+from .database import BASE_DIR
+
+# ChromaDB lives next to the SQLite database under the project data directory
+CHROMADB_PATH = BASE_DIR / "data" / "chromadb"
+
+@lru_cache(maxsize=1)
+def get_chroma_client():
+    """Get the shared ChromaDB client so the HNSW indices are only loaded once per process"""
+    return chromadb.PersistentClient(path=str(CHROMADB_PATH))
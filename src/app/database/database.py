@@ -1,34 +1,100 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 import os
 from pathlib import Path
 
+from ..config.service_config import settings
+
 # Get database path
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
 DATABASE_PATH = BASE_DIR / "data" / "banking_bot.db"
 DATABASE_PATH.parent.mkdir(exist_ok=True)
 
-# Database URL
-DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
-
-# Create engine with connection pooling
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=StaticPool,
-    connect_args={
-        "check_same_thread": False,
-        "timeout": 20,
-    },
-    echo=False,  # Set to True for SQL debugging
-)
-
-# Session factory
+# Database URL - SQLite always lives under the project data directory,
+# any other backend (e.g. Postgres) is taken from settings as-is
+if settings.database_url.startswith("sqlite"):
+    DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+else:
+    DATABASE_URL = settings.database_url
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Async drivers used by the request-path engine
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+_url = make_url(DATABASE_URL)
+if _url.get_backend_name() not in _ASYNC_DRIVERS:
+    raise ValueError(
+        f"Unsupported database backend '{_url.get_backend_name()}': the chat service needs an async driver, "
+        f"supported backends are {', '.join(_ASYNC_DRIVERS)}"
+    )
+ASYNC_DATABASE_URL = _url.set(drivername=_ASYNC_DRIVERS[_url.get_backend_name()])
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside a writer and NORMAL sync cuts fsyncs per commit"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+if IS_SQLITE:
+    # SQLite connections are cheap file handles, so skip pooling entirely
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        pool_pre_ping=False,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": 30,
+        },
+        echo=False,  # Set to True for SQL debugging
+    )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"timeout": 30},
+        echo=False,
+    )
+
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+else:
+    # Create engine with connection pooling
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=True,
+        echo=False,  # Set to True for SQL debugging
+    )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=True,
+        echo=False,
+    )
+
+# Session factories - sync for tools and auth, async for the chat request path
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
 
+def create_schema(bind):
+    """Create missing tables, plus indexes declared after their table was created.
+    
+    Covers the models imported so far, so callers import database_models first.
+    """
+    Base.metadata.create_all(bind=bind)
+    # create_all skips existing tables, so add indexes declared after a table was created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -36,3 +102,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def warm_up_pool():
+    """Open pool_size connections up front so the first requests don't pay connect latency"""
+    if IS_SQLITE:
+        return
+    connections = [engine.connect() for _ in range(settings.db_pool_size)]
+    for connection in connections:
+        connection.close()
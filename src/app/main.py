@@ -1,34 +1,43 @@
-# Setup project path for consistent imports
-import sys
 from contextlib import asynccontextmanager
-from pathlib import Path
 
+import orjson
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(PROJECT_ROOT))
+from fastapi.responses import JSONResponse, Response
 
 from src.app.api.endpoints import auth, chat, feedback, health
 from src.app.config.service_config import settings
-from src.app.database.database import Base, engine
+from src.app.database.chromadb_client import get_chroma_client
+from src.app.database.database import create_schema, engine, warm_up_pool
+from src.app.services.bot_log_service import bot_log_service
+from src.app.services.feedback_service import ensure_feedback_unique_index
 from src.app.utils.logger_utils import get_logger, setup_logging
 
 # Setup logging
 setup_logging(settings.log_level, settings.log_file)
 logger = get_logger(__name__)
 
+# Root payload never changes at runtime, so serialize it once at import
+_ROOT_BYTES = orjson.dumps({
+    "message": "Banking Bot API",
+    "version": settings.app_version,
+    "status": "running",
+    "docs_url": "/docs",
+    "redoc_url": "/redoc",
+    "health_check": "/health",
+    "chat_endpoint": "/chat",
+    "auth_endpoint": "/auth"
+})
+
+# Number of chunk metadatas fetched per ChromaDB call in the startup inventory
+_INVENTORY_PAGE_SIZE = 1000
+
 def display_chromadb_documents():
     """Display information about documents available in ChromaDB"""
     try:
-        import chromadb
-        from pathlib import Path
-        
-        # Connect to ChromaDB
-        chromadb_path = Path(PROJECT_ROOT) / "data" / "chromadb"
-        client = chromadb.PersistentClient(path=str(chromadb_path))
+        # Connect to ChromaDB (shared with the document retrieval tool)
+        client = get_chroma_client()
         
         logger.info("=" * 80)
         logger.info("📚 CHROMADB DOCUMENT INVENTORY")
@@ -45,31 +54,36 @@ def display_chromadb_documents():
                 logger.info("=" * 80)
                 return
             
-            # Get all documents with metadata
-            results = collection.get(include=["metadatas"])
-            
-            # Group by unique document titles
+            # Page through metadata only (no documents/embeddings) so large
+            # collections never cross the SQLite/Python boundary in one piece
             documents = {}
-            for metadata in results["metadatas"]:
-                source_title = metadata.get("source_title", metadata.get("file_name", "Unknown"))
-                doc_type = metadata.get("document_type", "unknown")
-                file_ext = metadata.get("file_extension", "unknown")
-                
-                if source_title not in documents:
-                    documents[source_title] = {
-                        "title": source_title,
-                        "type": doc_type,
-                        "extension": file_ext,
-                        "chunk_count": 0,
-                        "pages": set()
-                    }
+            for offset in range(0, total_chunks, _INVENTORY_PAGE_SIZE):
+                page = collection.get(
+                    include=["metadatas"],
+                    limit=_INVENTORY_PAGE_SIZE,
+                    offset=offset
+                )
                 
-                documents[source_title]["chunk_count"] += 1
-                
-                # Collect page numbers if available
-                page_num = metadata.get("page_number")
-                if page_num and page_num != "unknown":
-                    documents[source_title]["pages"].add(page_num)
+                # Group by unique document titles
+                for metadata in page["metadatas"]:
+                    source_title = metadata.get("source_title", metadata.get("file_name", "Unknown"))
+                    
+                    info = documents.get(source_title)
+                    if info is None:
+                        info = documents[source_title] = {
+                            "title": source_title,
+                            "type": metadata.get("document_type", "unknown"),
+                            "extension": metadata.get("file_extension", "unknown"),
+                            "chunk_count": 0,
+                            "pages": set()
+                        }
+                    
+                    info["chunk_count"] += 1
+                    
+                    # Collect page numbers if available
+                    page_num = metadata.get("page_number")
+                    if page_num and page_num != "unknown":
+                        info["pages"].add(page_num)
             
             # Display summary
             logger.info(f"📊 Total Chunks: {total_chunks}")
@@ -115,12 +129,18 @@ async def lifespan(app: FastAPI):
     
     # Create database tables
     try:
-        Base.metadata.create_all(bind=engine)
+        create_schema(engine)
+        
+        # Older databases have a plain feedback index; fails if they also hold duplicate feedback
+        ensure_feedback_unique_index(engine)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Failed to create database tables: {str(e)}")
         raise
     
+    # Open pooled connections before accepting traffic
+    warm_up_pool()
+    
     # Display ChromaDB document inventory
     display_chromadb_documents()
     
@@ -135,12 +155,20 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize banking agent factory: {str(e)}")
         raise
     
+    # Batch bot log writes off the request path
+    bot_log_service.start()
+    
+    # Build the OpenAPI schema now instead of on the first /docs hit, then freeze it
+    openapi_schema = app.openapi()
+    app.openapi = lambda: openapi_schema
+    
     logger.info("Banking Bot API startup completed")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Banking Bot API...")
+    await bot_log_service.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -169,8 +197,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=settings.allowed_methods,
+    allow_headers=settings.allowed_headers,
+    max_age=settings.cors_max_age,
 )
 
 # Include routers
@@ -208,21 +237,12 @@ async def global_exception_handler(request, exc):
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
-    return {
-        "message": "Banking Bot API",
-        "version": settings.app_version,
-        "status": "running",
-        "docs_url": "/docs",
-        "redoc_url": "/redoc",
-        "health_check": "/health",
-        "chat_endpoint": "/chat",
-        "auth_endpoint": "/auth"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 # Development server
 if __name__ == "__main__":
     uvicorn.run(
-        "main:app",
+        "src.app.main:app",
         host="0.0.0.0",
         port=2024,  # Changed to port 2024 for agent chat UI compatibility
         reload=settings.debug,
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional, Union, Dict, Any
 from datetime import datetime
 from enum import Enum
 
@@ -78,6 +78,14 @@ class DocumentInfo(BaseModel):
     relevance_score: float
     document_type: str
 
+class Message(BaseModel):
+    """A single conversation turn; frozen so history entries can be shared without copying"""
+    model_config = ConfigDict(frozen=True)
+
+    role: Literal["user", "assistant", "system", "tool"]
+    content: str
+    timestamp: datetime
+
 class AgentState(BaseModel):
     """State of the banking agent during processing"""
     user_id: str
@@ -91,6 +99,6 @@ class ChatContext(BaseModel):
     """Context for chat history and memory"""
     user_id: str
     chat_thread_id: str
-    conversation_history: List[Dict[str, Any]] = []
+    conversation_history: List[Message] = []
     user_preferences: Dict[str, Any] = {}
     session_data: Dict[str, Any] = {}
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from .agent_models import Message
+
 # User models
 class UserCreate(BaseModel):
     user_id: str = Field(..., min_length=3, max_length=50)
@@ -32,6 +34,8 @@ class ChatMessage(BaseModel):
     chat_thread_id: Optional[str] = None
 
 class EvaluationScore(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     accuracy: int = Field(..., ge=1, le=5, description="How accurate the response is (1-5)")
     completeness: int = Field(..., ge=1, le=5, description="How complete the response is (1-5)")
     context_adherence: int = Field(..., ge=1, le=5, description="How well the response adheres to context (1-5)")
@@ -137,7 +141,7 @@ class ToolResponse(BaseModel):
 
 # Agent state models
 class AgentState(BaseModel):
-    messages: List[Dict[str, Any]]
+    messages: List[Message]
     user_id: str
     chat_thread_id: str
     current_step: str
@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database.database import Base
 
-class User(Base):
+class CreatedAtMixin:
+    """Server-generated creation timestamp shared by all tables"""
+    created_at = Column(DateTime, server_default=func.now())
+
+class TimestampMixin(CreatedAtMixin):
+    """Creation plus last-update timestamps for mutable tables"""
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class User(TimestampMixin, Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -13,49 +21,45 @@ class User(Base):
     first_name = Column(String(50))
     last_name = Column(String(50))
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     accounts = relationship("Account", back_populates="user")
+    credit_cards = relationship("CreditCard", back_populates="user")
     chat_histories = relationship("ChatHistory", back_populates="user")
     feedbacks = relationship("Feedback", back_populates="user")
 
-class Account(Base):
+class Account(TimestampMixin, Base):
     __tablename__ = "accounts"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     account_number = Column(String(20), unique=True, index=True, nullable=False)
-    account_type = Column(String(20), nullable=False)  # checking, savings, credit
+    account_type = Column(Enum("checking", "savings", "credit", name="account_type", length=20, create_constraint=True), nullable=False)
     balance = Column(Float, default=0.0)
     currency = Column(String(3), default="USD")
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="accounts")
     transactions = relationship("Transaction", back_populates="account")
 
-class Transaction(Base):
+class Transaction(CreatedAtMixin, Base):
     __tablename__ = "transactions"
     
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), index=True, nullable=False)
     transaction_id = Column(String(50), unique=True, index=True, nullable=False)
-    transaction_type = Column(String(20), nullable=False)  # debit, credit
+    transaction_type = Column(Enum("debit", "credit", name="transaction_type", length=20, create_constraint=True), nullable=False)
     amount = Column(Float, nullable=False)
     description = Column(String(255))
     category = Column(String(50))
     merchant = Column(String(100))
     transaction_date = Column(DateTime, nullable=False)
-    created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
     account = relationship("Account", back_populates="transactions")
 
-class CreditCard(Base):
+class CreditCard(TimestampMixin, Base):
     __tablename__ = "credit_cards"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -68,11 +72,16 @@ class CreditCard(Base):
     minimum_payment = Column(Float, default=0.0)
     due_date = Column(DateTime)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="credit_cards")
 
-class ChatHistory(Base):
+class ChatHistory(CreatedAtMixin, Base):
     __tablename__ = "chat_history"
+    __table_args__ = (
+        # Covers the per-user / per-thread lookups ordered by created_at in ChatService
+        Index("ix_chat_user_thread_created", "user_id", "chat_thread_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -82,28 +91,29 @@ class ChatHistory(Base):
     query_type = Column(String(50))  # account_info, transaction, policy, general
     tools_used = Column(String(255))  # JSON string of tools used
     response_time_ms = Column(Integer)
-    created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="chat_histories")
     feedbacks = relationship("Feedback", back_populates="chat_message")
 
-class Feedback(Base):
+class Feedback(CreatedAtMixin, Base):
     __tablename__ = "feedback"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    chat_history_id = Column(Integer, ForeignKey("chat_history.id"), nullable=False)
+    chat_history_id = Column(Integer, ForeignKey("chat_history.id"), unique=True, index=True, nullable=False)  # one feedback per message
     rating = Column(Integer)  # 1 (thumbs down) or 2 (thumbs up)
     comments = Column(Text)
-    created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="feedbacks")
     chat_message = relationship("ChatHistory", back_populates="feedbacks")
 
-class BotLog(Base):
+class BotLog(CreatedAtMixin, Base):
     __tablename__ = "bot_logs"
+    __table_args__ = (
+        Index("ix_botlog_user_thread", "user_id", "chat_thread_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -114,9 +124,8 @@ class BotLog(Base):
     endpoint = Column(String(100))
     ip_address = Column(String(45))
     user_agent = Column(String(255))
-    created_at = Column(DateTime, server_default=func.now())
 
-class DocumentChunk(Base):
+class DocumentChunk(CreatedAtMixin, Base):
     __tablename__ = "document_chunks"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -124,4 +133,3 @@ class DocumentChunk(Base):
     chunk_id = Column(String(100), unique=True, index=True, nullable=False)
     content = Column(Text, nullable=False)
     doc_metadata = Column("metadata", Text)  # Map to 'metadata' column but use 'doc_metadata' attribute
-    created_at = Column(DateTime, server_default=func.now())
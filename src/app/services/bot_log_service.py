@@ -0,0 +1,99 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from ..database.database import AsyncSessionLocal
+from ..models.database_models import BotLog
+from ..utils.logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+class BotLogService:
+    """Batches BotLog rows from request handlers into bulk INSERTs off the request path.
+    
+    Writes go through their own async session, so they never share a connection with the
+    chat write of the request that produced them.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.2, max_queue_size: int = 10_000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # seconds
+        self.max_queue_size = max_queue_size
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._flusher is not None and not self._flusher.done()
+
+    def start(self):
+        """Start the background flush task (called from the app lifespan)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info("Bot log writer started")
+
+    async def stop(self):
+        """Stop the flush task and write out anything still queued"""
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await self._write_batch(pending)
+        logger.info(f"Bot log writer stopped, flushed {len(pending)} pending logs")
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """Queue a BotLog row; returns False when the writer is not running.
+        
+        When the queue is full the row is dropped (and still reported as handled) rather than
+        pushing back on the request path.
+        """
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Bot log queue full, dropped {row['log_level']} log for thread {row['chat_thread_id']}")
+        return True
+
+    async def _flush_loop(self):
+        """Drain up to batch_size rows or flush_interval seconds, then write them in one INSERT"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write_batch(batch)
+
+    async def _write_batch(self, rows: List[Dict[str, Any]]):
+        """Insert a batch of BotLog rows with a single executemany + commit"""
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(insert(BotLog), rows)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Failed to write {len(rows)} bot logs: {str(e)}")
+
+# Global bot log service instance
+bot_log_service = BotLogService()
@@ -1,18 +1,42 @@
 from typing import List, Dict, Any, Optional, AsyncIterator
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, desc, func, insert, select
 from datetime import datetime
+import time
 import uuid
-import json
+from types import MappingProxyType
+
+import orjson
 
 from ..agents.banking_agent import get_banking_agent
-from ..workflows.banking_workflow import get_banking_workflow
+from ..workflows.banking_workflow import BankingWorkflow, get_banking_workflow
 from ..models.database_models import ChatHistory, User, BotLog
 from ..models.api_models import ChatMessage, ChatResponse, ChatHistoryResponse, EvaluationScore
+from .bot_log_service import bot_log_service
+from .rate_limit_service import rate_limit_service
+from .response_cache_service import response_cache
 from ..utils.logger_utils import get_logger
 
 logger = get_logger(__name__)
 
+# Reasoning tokens are forwarded in batches of this many tokens or this many seconds, whichever comes first
+TOKEN_BATCH_SIZE = 16
+TOKEN_BATCH_INTERVAL = 0.05
+
+# Rows fetched per round trip when streaming chat history
+HISTORY_BATCH_SIZE = 500
+
+# Neutral scores used for any criteria the judge did not return
+EVAL_DEFAULTS = MappingProxyType({
+    "accuracy": 3,
+    "completeness": 3,
+    "context_adherence": 3,
+    "professional_quality": 3,
+    "overall_score": 3.0,
+    "reasoning": "Evaluation completed",
+    "confidence_level": "MEDIUM"
+})
+
 class ChatService:
     """Service for handling chat interactions with the banking agent"""
     
@@ -24,35 +48,59 @@ class ChatService:
         self, 
         message: ChatMessage, 
         user: User, 
-        db: Session
+        db: AsyncSession
     ) -> ChatResponse:
         """Process a chat message and return response with evaluation"""
+        pending_logs = []
         try:
             # Generate chat_thread_id if not provided
             chat_thread_id = message.chat_thread_id or str(uuid.uuid4())
             
-            # Log the incoming message
-            await self._log_bot_interaction(
-                db, user.id, chat_thread_id, "INFO", 
+            # Buffer the incoming message log - it is written with the chat row in one commit
+            pending_logs.append(self._bot_log_row(
+                user.id, chat_thread_id, "INFO", 
                 f"Processing message with evaluation: {message.message[:100]}..."
-            )
+            ))
             
-            # Use the banking workflow with evaluation
-            workflow = SimpleBankingAgentWithJudge(user.user_id)
-            start_time = datetime.now()
+            start_ns = time.perf_counter_ns()
             
-            # Get response with evaluation
-            result = await workflow.process_message(
-                message=message.message,
-                thread_id=chat_thread_id,
-                user_id=user.user_id
-            )
+            workflow = get_banking_workflow()
+            agent = workflow.banking_agent
+            
+            # Repeated questions are answered from the cache without running the workflow,
+            # but only within the same conversation state (see ResponseCacheService.make_scope)
+            history = agent.get_conversation_history(user.user_id, chat_thread_id)
+            cache_scope = response_cache.make_scope(user.user_id, chat_thread_id, history)
+            cache_key = response_cache.make_key(cache_scope, message.message)
+            result = response_cache.get(cache_key)
+            embedding = None
+            
+            if result is None and response_cache.has_vectors(cache_scope):
+                # Fall back to a paraphrase of something asked in the same scope; with nothing
+                # cached there the embedding round trip is skipped
+                embedding = await response_cache.embed(message.message)
+                result = response_cache.get_similar(cache_scope, embedding)
+            
+            if result is None:
+                # Stay inside provider quotas instead of hitting 429 retries
+                await rate_limit_service.acquire(user.user_id, message.message)
+                
+                # Run the same workflow as the streaming endpoint and keep its final answer and evaluation
+                result = await self._run_workflow(workflow, message.message, chat_thread_id, user.user_id)
+                
+                if response_cache.is_cacheable(result):
+                    if embedding is None:
+                        embedding = await response_cache.embed(message.message)
+                    response_cache.set(cache_key, result, cache_scope, embedding)
+            else:
+                logger.info(f"Response cache hit for user {user.user_id}")
+                # The agent did not run, so the exchange has to be added to the thread's history here
+                await agent.record_turn(message.message, result["response"], chat_thread_id, user.user_id)
             
-            end_time = datetime.now()
-            response_time_ms = int((end_time - start_time).total_seconds() * 1000)
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
             # Extract data from result
-            bot_response = result.get("response", "I apologize, but I couldn't process your request.")
+            bot_response = result.get("response") or "I apologize, but I couldn't process your request."
             tools_used = result.get("tools_used", [])
             query_type = "banking_query"
             evaluation_data = result.get("evaluation")
@@ -60,36 +108,30 @@ class ChatService:
             # Create evaluation score object if available
             evaluation_score = None
             if evaluation_data:
-                evaluation_score = EvaluationScore(
-                    accuracy=evaluation_data.get("accuracy", 3),
-                    completeness=evaluation_data.get("completeness", 3),
-                    context_adherence=evaluation_data.get("context_adherence", 3),  
-                    professional_quality=evaluation_data.get("professional_quality", 3),
-                    overall_score=evaluation_data.get("overall_score", 3.0),
-                    reasoning=evaluation_data.get("reasoning", "Evaluation completed"),
-                    confidence_level=evaluation_data.get("confidence_level", "MEDIUM")
-                )
-            
-            # Save to database
-            chat_history = ChatHistory(
-                user_id=user.id,
-                chat_thread_id=chat_thread_id,
-                user_query=message.message,
-                bot_response=bot_response,
-                query_type=query_type,
-                tools_used=json.dumps(tools_used),
-                response_time_ms=response_time_ms
-            )
+                evaluation_score = EvaluationScore.model_validate(EVAL_DEFAULTS | evaluation_data)
             
-            db.add(chat_history)
-            db.commit()
-            db.refresh(chat_history)
+            # Save to database - RETURNING hands back the generated id without a follow-up SELECT
+            chat_history_id = (await db.execute(
+                insert(ChatHistory).values(
+                    user_id=user.id,
+                    chat_thread_id=chat_thread_id,
+                    user_query=message.message,
+                    bot_response=bot_response,
+                    query_type=query_type,
+                    tools_used=orjson.dumps(tools_used).decode(),
+                    response_time_ms=response_time_ms
+                ).returning(ChatHistory.id)
+            )).scalar_one()
             
             # Log successful interaction with evaluation
-            await self._log_bot_interaction(
-                db, user.id, chat_thread_id, "INFO", 
-                f"Response with evaluation generated successfully in {response_time_ms}ms. Score: {evaluation_data.get('overall_score', 'N/A') if evaluation_data else 'N/A'}"
-            )
+            pending_logs.append(self._bot_log_row(
+                user.id, chat_thread_id, "INFO", 
+                f"Response with evaluation generated successfully in {response_time_ms}ms (chat_history_id={chat_history_id}). Score: {evaluation_data.get('overall_score', 'N/A') if evaluation_data else 'N/A'}"
+            ))
+            
+            # Chat row and its logs go out in a single transaction
+            await self._stage_bot_logs(db, pending_logs)
+            await db.commit()
             
             return ChatResponse(
                 response=bot_response,
@@ -102,12 +144,18 @@ class ChatService:
             
         except Exception as e:
             logger.error(f"Chat processing error: {str(e)}")
+            await db.rollback()
             
-            # Log the error
-            await self._log_bot_interaction(
-                db, user.id, chat_thread_id, "ERROR", 
+            # Log the error together with anything buffered before the failure
+            pending_logs.append(self._bot_log_row(
+                user.id, chat_thread_id, "ERROR", 
                 f"Chat processing with evaluation failed: {str(e)}"
-            )
+            ))
+            try:
+                if await self._stage_bot_logs(db, pending_logs):
+                    await db.commit()
+            except Exception as log_error:
+                logger.error(f"Failed to log bot interaction: {str(log_error)}")
             
             # Return error response
             return ChatResponse(
@@ -123,24 +171,34 @@ class ChatService:
         self,
         message: ChatMessage,
         user: User,
-        db: Session
+        db: AsyncSession
     ) -> AsyncIterator[Dict[str, Any]]:
-        """Stream chat response in real-time with evaluation using banking workflow"""
+        """Stream chat response in real-time with evaluation using banking workflow.
+        
+        Chunks may carry datetime values; the SSE endpoint serialises them with orjson.
+        """
         chat_thread_id = message.chat_thread_id or str(uuid.uuid4())
+        pending_logs = []
         
         try:
-            # Log the streaming request
-            await self._log_bot_interaction(
-                db, user.id, chat_thread_id, "INFO", 
+            # Buffer the streaming request log - it is written with the chat row in one commit
+            pending_logs.append(self._bot_log_row(
+                user.id, chat_thread_id, "INFO", 
                 f"Starting streaming response with evaluation for: {message.message[:100]}..."
-            )
+            ))
+            
+            # Stay inside provider quotas instead of hitting 429 retries
+            await rate_limit_service.acquire(user.user_id, message.message)
             
             # Use the new banking workflow with evaluation
             workflow = get_banking_workflow()
             
             # Stream response using the workflow - evaluation runs AFTER streaming
-            full_response = ""
+            response_parts = []
+            token_batch = []
+            batch_started = 0.0
             tools_used = []
+            tools_seen = set()  # O(1) membership checks; tools_used keeps first-use order
             query_type = "banking_query"
             evaluation_data = None
             
@@ -149,23 +207,36 @@ class ChatService:
                 chat_thread_id,
                 user.user_id
             ):
-                # Yield the chunk to the client IMMEDIATELY
-                yield chunk
-                
-                # Collect data for database storage based on chunk type
                 chunk_type = chunk.get("type", "")
                 
                 if chunk_type == "reasoning_token":
-                    # Accumulate LLM response tokens
-                    full_response += chunk.get("content", "")
+                    # Accumulate LLM response tokens and forward them in small batches
+                    response_parts.append(chunk.get("content", ""))
+                    if not token_batch:
+                        batch_started = time.monotonic()
+                    token_batch.append(chunk)
+                    if len(token_batch) >= TOKEN_BATCH_SIZE or time.monotonic() - batch_started >= TOKEN_BATCH_INTERVAL:
+                        yield self._merge_token_chunks(token_batch)
+                        token_batch = []
+                    continue
+                
+                # Flush buffered tokens first so the client sees events in order
+                if token_batch:
+                    yield self._merge_token_chunks(token_batch)
+                    token_batch = []
+                
+                # Yield the chunk to the client IMMEDIATELY
+                yield chunk
                 
-                elif chunk_type == "react_step":
+                # Collect data for database storage based on chunk type
+                if chunk_type == "react_step":
                     phase = chunk.get("phase", "")
                     if phase == "ACTION":
                         # Track tool usage
                         details = chunk.get("details", {})
                         tool_name = details.get("tool_name")
-                        if tool_name and tool_name not in tools_used:
+                        if tool_name and tool_name not in tools_seen:
+                            tools_seen.add(tool_name)
                             tools_used.append(tool_name)
                     
                     elif phase == "FINAL_ANSWER":
@@ -173,33 +244,38 @@ class ChatService:
                         details = chunk.get("details", {})
                         final_answer = details.get("final_answer", "")
                         if final_answer:
-                            full_response = final_answer
+                            response_parts = [final_answer]
                 
                 elif chunk_type == "evaluation_complete":
                     # Capture evaluation data - this arrives AFTER streaming is done
                     evaluation_data = chunk.get("evaluation", {})
             
-            # Save the complete conversation to database
+            if token_batch:
+                yield self._merge_token_chunks(token_batch)
+            full_response = "".join(response_parts)
+            
+            # Save the complete conversation to database - Core insert, no ORM instance to track
             if full_response:
-                chat_history = ChatHistory(
+                await db.execute(insert(ChatHistory).values(
                     user_id=user.id,
                     chat_thread_id=chat_thread_id,
                     user_query=message.message,
                     bot_response=full_response,
                     query_type=query_type,
-                    tools_used=json.dumps(tools_used),
+                    tools_used=orjson.dumps(tools_used).decode(),
                     response_time_ms=0  # Not applicable for streaming
-                )
-                
-                db.add(chat_history)
-                db.commit()
+                ))
                 
                 # Log successful interaction with evaluation
                 evaluation_score = evaluation_data.get("overall_score", "N/A") if evaluation_data else "N/A"
-                await self._log_bot_interaction(
-                    db, user.id, chat_thread_id, "INFO", 
+                pending_logs.append(self._bot_log_row(
+                    user.id, chat_thread_id, "INFO", 
                     f"Streaming completed successfully with {len(tools_used)} tools used. Evaluation score: {evaluation_score}"
-                )
+                ))
+            
+            # Chat row and its logs go out in a single transaction
+            if await self._stage_bot_logs(db, pending_logs) or full_response:
+                await db.commit()
             
             # Send completion event with evaluation summary ONLY if we have evaluation data
             # (The banking agent already sends its own completion event)
@@ -209,7 +285,7 @@ class ChatService:
                     "chat_thread_id": chat_thread_id,
                     "tools_used": tools_used,
                     "response_length": len(full_response),
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": datetime.now(),
                     "evaluation_summary": {
                         "overall_score": evaluation_data.get("overall_score"),
                         "confidence_level": evaluation_data.get("confidence_level"),
@@ -223,49 +299,37 @@ class ChatService:
             
         except Exception as e:
             logger.error(f"Streaming error: {str(e)}")
+            await db.rollback()
             
-            # Log the error
-            await self._log_bot_interaction(
-                db, user.id, chat_thread_id, "ERROR", 
+            # Log the error together with anything buffered before the failure
+            pending_logs.append(self._bot_log_row(
+                user.id, chat_thread_id, "ERROR", 
                 f"Streaming with evaluation failed: {str(e)}"
-            )
+            ))
+            try:
+                if await self._stage_bot_logs(db, pending_logs):
+                    await db.commit()
+            except Exception as log_error:
+                logger.error(f"Failed to log bot interaction: {str(log_error)}")
             
             # Send error event
             yield {
                 "type": "error",
                 "message": f"Streaming error: {str(e)}",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now()
             }
     
-    def get_chat_history(
+    async def get_chat_history(
         self, 
         user: User, 
         chat_thread_id: Optional[str], 
         limit: int,
-        db: Session
+        db: AsyncSession
     ) -> List[ChatHistoryResponse]:
         """Get chat history for a user"""
         try:
-            query = db.query(ChatHistory).filter(ChatHistory.user_id == user.id)
-            
-            if chat_thread_id:
-                query = query.filter(ChatHistory.chat_thread_id == chat_thread_id)
-            
-            chat_histories = query.order_by(desc(ChatHistory.created_at)).limit(limit).all()
-            
             # Convert to response format
-            response_list = []
-            for chat in chat_histories:
-                response_list.append(ChatHistoryResponse(
-                    id=chat.id,
-                    chat_thread_id=chat.chat_thread_id,
-                    user_query=chat.user_query,
-                    bot_response=chat.bot_response,
-                    query_type=chat.query_type,
-                    tools_used=chat.tools_used,
-                    response_time_ms=chat.response_time_ms,
-                    created_at=chat.created_at
-                ))
+            response_list = [chat async for chat in self.iter_chat_history(user, chat_thread_id, limit, db)]
             
             logger.info(f"Retrieved {len(response_list)} chat history items for user {user.user_id}")
             return response_list
@@ -274,32 +338,80 @@ class ChatService:
             logger.error(f"Error retrieving chat history: {str(e)}")
             return []
     
-    def get_user_threads(self, user: User, db: Session) -> List[Dict[str, Any]]:
+    async def iter_chat_history(
+        self,
+        user: User,
+        chat_thread_id: Optional[str],
+        limit: Optional[int],
+        db: AsyncSession,
+        offset: int = 0
+    ) -> AsyncIterator[ChatHistoryResponse]:
+        """Stream a user's chat history newest-first, fetching HISTORY_BATCH_SIZE rows at a time.
+        
+        Rows are ordered by created_at then id, so offset pages through the history without gaps.
+        """
+        # Select only the response columns as plain rows - no ORM instances to hydrate
+        query = select(
+            ChatHistory.id,
+            ChatHistory.chat_thread_id,
+            ChatHistory.user_query,
+            ChatHistory.bot_response,
+            ChatHistory.query_type,
+            ChatHistory.tools_used,
+            ChatHistory.response_time_ms,
+            ChatHistory.created_at
+        ).where(ChatHistory.user_id == user.id)
+        
+        if chat_thread_id:
+            query = query.where(ChatHistory.chat_thread_id == chat_thread_id)
+        
+        query = query.order_by(desc(ChatHistory.created_at), desc(ChatHistory.id))
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+        
+        result = await db.stream(query.execution_options(yield_per=HISTORY_BATCH_SIZE))
+        async for row in result.mappings():
+            yield ChatHistoryResponse(**row)
+    
+    async def get_user_threads(self, user: User, db: AsyncSession) -> List[Dict[str, Any]]:
         """Get all chat threads for a user"""
         try:
-            # Get distinct thread IDs with latest message info
-            query = db.query(
+            # Rank each thread's messages newest-first and count them in the same pass,
+            # so the database returns one row per thread
+            partition = ChatHistory.chat_thread_id
+            ranked = select(
                 ChatHistory.chat_thread_id,
                 ChatHistory.created_at,
-                ChatHistory.user_query
-            ).filter(
+                ChatHistory.user_query,
+                func.row_number().over(
+                    partition_by=partition,
+                    order_by=(desc(ChatHistory.created_at), desc(ChatHistory.id))
+                ).label("position"),
+                func.count().over(partition_by=partition).label("message_count")
+            ).where(
                 ChatHistory.user_id == user.id
-            ).order_by(desc(ChatHistory.created_at))
-            
-            threads = {}
-            for chat_thread_id, created_at, user_query in query:
-                if chat_thread_id not in threads:
-                    threads[chat_thread_id] = {
-                        "chat_thread_id": chat_thread_id,
-                        "last_message": user_query[:100] + "..." if len(user_query) > 100 else user_query,
-                        "last_activity": created_at,
-                        "message_count": 0
-                    }
-                threads[chat_thread_id]["message_count"] += 1
-            
-            # Convert to list and sort by last activity
-            thread_list = list(threads.values())
-            thread_list.sort(key=lambda x: x["last_activity"], reverse=True)
+            ).subquery()
+            
+            query = select(
+                ranked.c.chat_thread_id,
+                ranked.c.created_at,
+                ranked.c.user_query,
+                ranked.c.message_count
+            ).where(
+                ranked.c.position == 1
+            ).order_by(desc(ranked.c.created_at))
+            
+            thread_list = [
+                {
+                    "chat_thread_id": chat_thread_id,
+                    "last_message": user_query[:100] + "..." if len(user_query) > 100 else user_query,
+                    "last_activity": created_at,
+                    "message_count": message_count
+                }
+                for chat_thread_id, created_at, user_query, message_count in await db.execute(query)
+            ]
             
             logger.info(f"Retrieved {len(thread_list)} threads for user {user.user_id}")
             return thread_list
@@ -308,76 +420,105 @@ class ChatService:
             logger.error(f"Error retrieving user threads: {str(e)}")
             return []
 
-    def delete_thread(self, user: User, thread_id: str, db: Session) -> bool:
+    async def delete_thread(self, user: User, thread_id: str, db: AsyncSession) -> bool:
         """Delete a specific chat thread for a user"""
         try:
-            # Delete all chat history entries for this thread and user
-            deleted_count = db.query(ChatHistory).filter(
-                ChatHistory.user_id == user.id,
-                ChatHistory.chat_thread_id == thread_id
-            ).delete()
-            
-            # Delete related bot logs
-            db.query(BotLog).filter(
-                BotLog.user_id == user.id,
-                BotLog.chat_thread_id == thread_id
-            ).delete()
-            
-            db.commit()
+            deleted_count = await self._delete_chat_rows(db, user.id, thread_id)
+            await db.commit()
             
             logger.info(f"Deleted thread {thread_id} for user {user.user_id}, removed {deleted_count} entries")
             return deleted_count > 0
             
         except Exception as e:
             logger.error(f"Error deleting thread {thread_id}: {str(e)}")
-            db.rollback()
+            await db.rollback()
             return False
 
-    def delete_all_threads(self, user: User, db: Session) -> int:
+    async def delete_all_threads(self, user: User, db: AsyncSession) -> int:
         """Delete all chat threads for a user"""
         try:
-            # Delete all chat history entries for this user
-            deleted_count = db.query(ChatHistory).filter(
-                ChatHistory.user_id == user.id
-            ).delete()
-            
-            # Delete related bot logs
-            db.query(BotLog).filter(
-                BotLog.user_id == user.id
-            ).delete()
-            
-            db.commit()
+            deleted_count = await self._delete_chat_rows(db, user.id)
+            await db.commit()
             
             logger.info(f"Deleted all threads for user {user.user_id}, removed {deleted_count} entries")
             return deleted_count
             
         except Exception as e:
             logger.error(f"Error deleting all threads for user {user.user_id}: {str(e)}")
-            db.rollback()
+            await db.rollback()
             return 0
 
-    async def _log_bot_interaction(
-        self, 
-        db: Session, 
-        user_id: int, 
-        chat_thread_id: str, 
-        log_level: str, 
-        message: str
-    ):
-        """Log bot interaction to database"""
-        try:
-            bot_log = BotLog(
-                user_id=user_id,
-                chat_thread_id=chat_thread_id,
-                log_level=log_level,
-                message=message
-            )
-            
-            db.add(bot_log)
-            db.commit()
-            
-        except Exception as e:
-            logger.error(f"Failed to log bot interaction: {str(e)}")
+    async def _delete_chat_rows(self, db: AsyncSession, user_id: int, thread_id: Optional[str] = None) -> int:
+        """Delete chat history and bot logs for a user (optionally one thread) in the open transaction.
+        
+        bot_logs.chat_thread_id can't cascade from chat_history since thread ids aren't unique there,
+        so both bulk DELETEs run back to back without syncing the identity map. Returns the number
+        of chat history rows removed.
+        """
+        chat_filter = [ChatHistory.user_id == user_id]
+        log_filter = [BotLog.user_id == user_id]
+        if thread_id is not None:
+            chat_filter.append(ChatHistory.chat_thread_id == thread_id)
+            log_filter.append(BotLog.chat_thread_id == thread_id)
+        
+        result = await db.execute(
+            delete(ChatHistory).where(*chat_filter).execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(BotLog).where(*log_filter).execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def _run_workflow(self, workflow: BankingWorkflow, message: str, chat_thread_id: str, user_id: str) -> Dict[str, Any]:
+        """Drain the workflow stream into the final answer, tools used (first-use order) and evaluation.
+        
+        success is False when the workflow reported an error or produced no answer.
+        """
+        result = {"response": "", "tools_used": [], "evaluation": None, "success": True}
+        async for chunk in workflow.stream_with_evaluation(message, chat_thread_id, user_id):
+            chunk_type = chunk.get("type", "")
+            if chunk_type == "error":
+                result["success"] = False
+            elif chunk_type == "react_step":
+                details = chunk.get("details", {})
+                if chunk.get("phase") == "ACTION":
+                    tool_name = details.get("tool_name")
+                    if tool_name and tool_name not in result["tools_used"]:
+                        result["tools_used"].append(tool_name)
+                elif chunk.get("phase") == "FINAL_ANSWER":
+                    result["response"] = details.get("final_answer", "")
+            elif chunk_type == "evaluation_complete":
+                result["evaluation"] = chunk.get("evaluation")
+        
+        result["success"] = result["success"] and bool(result["response"])
+        return result
+
+    def _merge_token_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Collapse consecutive reasoning_token chunks into one, keeping the first chunk's metadata"""
+        if len(chunks) == 1:
+            return chunks[0]
+        merged = dict(chunks[0])
+        merged["content"] = "".join(chunk.get("content", "") for chunk in chunks)
+        return merged
+
+    def _bot_log_row(self, user_id: int, chat_thread_id: str, log_level: str, message: str) -> Dict[str, Any]:
+        """Build a BotLog row for the bot log service or a bulk insert"""
+        return {
+            "user_id": user_id,
+            "chat_thread_id": chat_thread_id,
+            "log_level": log_level,
+            "message": message
+        }
+
+    async def _stage_bot_logs(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> bool:
+        """Hand rows to the bot log service, inserting any it refuses into the open transaction.
+        
+        Returns True when rows were added to the session and the caller still has to commit.
+        """
+        pending = [row for row in rows if not bot_log_service.enqueue(row)]
+        if pending:
+            await db.execute(insert(BotLog), pending)
+        return bool(pending)
 
 # Global chat service instance
 chat_service = ChatService()
@@ -1,6 +1,9 @@
 from typing import Optional, List
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy import case, delete, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from ..models.database_models import ChatHistory, User, Feedback
 from ..models.api_models import FeedbackCreate, FeedbackResponse
@@ -8,6 +11,45 @@ from ..utils.logger_utils import get_logger
 
 logger = get_logger(__name__)
 
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+_DIALECT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+def ensure_feedback_unique_index(bind: Engine):
+    """Make feedback.chat_history_id unique on databases created before the upsert relied on it.
+    
+    Those databases have a plain index under the same name, which index.create(checkfirst=True)
+    skips, and may hold several feedback rows per chat. Feedback is never deleted here: with
+    duplicates present this raises, and dedupe_feedback.py has to be run first.
+    """
+    index = next(ix for ix in Feedback.__table__.indexes if ix.unique)
+    existing = {ix["name"]: ix for ix in inspect(bind).get_indexes(Feedback.__tablename__)}
+    if existing.get(index.name, {}).get("unique"):
+        return
+    
+    with bind.begin() as connection:
+        duplicates = connection.scalar(
+            select(func.count(Feedback.id) - func.count(Feedback.chat_history_id.distinct()))
+        )
+        if duplicates:
+            raise RuntimeError(
+                f"The feedback table has {duplicates} duplicate rows for chats that already have feedback, "
+                f"so {index.name} cannot be made unique. Run `python dedupe_feedback.py` to keep only "
+                f"the newest feedback per chat, then start the app again."
+            )
+        if index.name in existing:
+            index.drop(connection)
+        index.create(connection)
+    logger.info(f"Created unique index {index.name}")
+
+def dedupe_feedback(bind: Engine) -> int:
+    """Delete all but the newest feedback row per chat and return how many rows were removed.
+    
+    A one-off migration for databases that predate the unique index; see dedupe_feedback.py.
+    """
+    with bind.begin() as connection:
+        newest = select(func.max(Feedback.id)).group_by(Feedback.chat_history_id)
+        return connection.execute(delete(Feedback).where(Feedback.id.not_in(newest))).rowcount
+
 class FeedbackService:
     """Service for handling user feedback on chat responses"""
     
@@ -20,7 +62,7 @@ class FeedbackService:
         """Submit feedback for a chat response"""
         try:
             # Verify the chat history belongs to the user
-            chat_history = db.query(ChatHistory).filter(
+            chat_history = db.query(ChatHistory.id).filter(
                 ChatHistory.id == feedback.chat_history_id,
                 ChatHistory.user_id == user.id
             ).first()
@@ -29,64 +71,68 @@ class FeedbackService:
                 logger.warning(f"Chat history {feedback.chat_history_id} not found for user {user.user_id}")
                 return None
             
-            # Check if feedback already exists for this chat
-            existing_feedback = db.query(Feedback).filter(
-                Feedback.chat_history_id == feedback.chat_history_id
-            ).first()
+            dialect = db.get_bind().dialect.name
+            dialect_insert = _DIALECT_INSERTS.get(dialect)
+            if dialect_insert is None:
+                logger.warning(f"No ON CONFLICT upsert for the {dialect} dialect, saving feedback with select-then-write")
+                return self._save_feedback_select_then_write(feedback, user, db)
+            
+            # Insert or update the chat's feedback in one atomic statement
+            upsert = dialect_insert(Feedback).values(
+                user_id=user.id,
+                chat_history_id=feedback.chat_history_id,
+                rating=feedback.rating,
+                comments=feedback.comments
+            )
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[Feedback.chat_history_id],
+                set_={
+                    "rating": upsert.excluded.rating,
+                    "comments": upsert.excluded.comments
+                }
+            ).returning(Feedback.id, Feedback.rating, Feedback.comments, Feedback.created_at)
+            
+            saved = db.execute(upsert).one()
+            db.commit()
             
-            if existing_feedback:
-                # Update existing feedback
-                existing_feedback.rating = feedback.rating
-                existing_feedback.comments = feedback.comments
-                existing_feedback.updated_at = datetime.now()
-                db.commit()
-                db.refresh(existing_feedback)
-                
-                logger.info(f"Updated feedback for chat {feedback.chat_history_id} by user {user.user_id}")
-                
-                return FeedbackResponse(
-                    id=existing_feedback.id,
-                    rating=existing_feedback.rating,
-                    comments=existing_feedback.comments,
-                    created_at=existing_feedback.created_at
-                )
-            else:
-                # Create new feedback
-                new_feedback = Feedback(
-                    chat_history_id=feedback.chat_history_id,
-                    rating=feedback.rating,
-                    comments=feedback.comments
-                )
-                
-                db.add(new_feedback)
-                db.commit()
-                db.refresh(new_feedback)
-                
-                logger.info(f"Created new feedback for chat {feedback.chat_history_id} by user {user.user_id}")
-                
-                return FeedbackResponse(
-                    id=new_feedback.id,
-                    rating=new_feedback.rating,
-                    comments=new_feedback.comments,
-                    created_at=new_feedback.created_at
-                )
+            logger.info(f"Saved feedback for chat {feedback.chat_history_id} by user {user.user_id}")
+            
+            return FeedbackResponse(**saved._mapping)
             
         except Exception as e:
             logger.error(f"Error submitting feedback: {str(e)}")
             db.rollback()
             return None
     
+    def _save_feedback_select_then_write(self, feedback: FeedbackCreate, user: User, db: Session) -> FeedbackResponse:
+        """Fallback for dialects without ON CONFLICT; two concurrent first submissions can both insert"""
+        saved = db.query(Feedback).filter(Feedback.chat_history_id == feedback.chat_history_id).first()
+        if saved is None:
+            saved = Feedback(user_id=user.id, chat_history_id=feedback.chat_history_id)
+            db.add(saved)
+        saved.rating = feedback.rating
+        saved.comments = feedback.comments
+        db.commit()
+        db.refresh(saved)
+        
+        logger.info(f"Saved feedback for chat {feedback.chat_history_id} by user {user.user_id}")
+        return FeedbackResponse.model_validate(saved)
+    
     def get_feedback_stats(self, user: User, db: Session) -> dict:
         """Get feedback statistics for a user"""
         try:
-            # Get all feedback for user's chats
-            feedback_query = db.query(Feedback).join(ChatHistory).filter(
+            # Count all feedback for user's chats and both ratings in a single query
+            total_feedback, thumbs_up, thumbs_down = db.query(
+                func.count(Feedback.id),
+                func.sum(case((Feedback.rating == 2, 1), else_=0)),
+                func.sum(case((Feedback.rating == 1, 1), else_=0))
+            ).join(ChatHistory).filter(
                 ChatHistory.user_id == user.id
-            )
+            ).one()
             
-            total_feedback = feedback_query.count()
-            thumbs_up = feedback_query.filter(Feedback.rating == 2).count()
-            thumbs_down = feedback_query.filter(Feedback.rating == 1).count()
+            # SUM over no rows is NULL
+            thumbs_up = thumbs_up or 0
+            thumbs_down = thumbs_down or 0
             
             stats = {
                 "total_feedback": total_feedback,
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..config.service_config import settings
+from ..utils.logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+class TokenBucket:
+    """Requests-per-minute bucket with an optional tokens-per-minute budget, refilled continuously"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_tokens = requests_per_minute
+        self._llm_tokens = tokens_per_minute or 0
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def is_idle(self, now: float) -> bool:
+        """True once nobody is waiting and a minute has passed - the bucket is full again, same as a new one"""
+        return not self._lock.locked() and now - self._last_refill >= 60
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_tokens = min(self.requests_per_minute, self._request_tokens + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._llm_tokens = min(self.tokens_per_minute, self._llm_tokens + elapsed * self.tokens_per_minute / 60)
+
+    async def acquire(self, estimated_tokens: int = 0) -> float:
+        """Wait until one request (and estimated_tokens LLM tokens) fit the budget; returns seconds waited"""
+        waited = 0.0
+        async with self._lock:  # callers are served in arrival order
+            if self.tokens_per_minute:
+                estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+            while True:
+                self._refill()
+                request_deficit = 1 - self._request_tokens
+                token_deficit = estimated_tokens - self._llm_tokens if self.tokens_per_minute else 0
+                if request_deficit <= 0 and token_deficit <= 0:
+                    self._request_tokens -= 1
+                    if self.tokens_per_minute:
+                        self._llm_tokens -= estimated_tokens
+                    return waited
+
+                delay = max(
+                    request_deficit * 60 / self.requests_per_minute,
+                    token_deficit * 60 / self.tokens_per_minute if token_deficit > 0 else 0
+                )
+                await asyncio.sleep(delay)
+                waited += delay
+
+class RateLimitService:
+    """Shapes LLM workflow calls with a per-user bucket and a bucket shared by this worker"""
+
+    def __init__(self, user_requests_per_minute: float, requests_per_minute: float, tokens_per_minute: float):
+        self.user_requests_per_minute = user_requests_per_minute
+        # Provider quotas are split evenly between worker processes
+        self._worker_bucket = TokenBucket(requests_per_minute, tokens_per_minute)
+        self._user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()  # least recently used first
+
+    def estimate_tokens(self, message: str) -> int:
+        """Rough prompt + completion estimate: ~4 characters per token plus a fixed reply allowance"""
+        return len(message) // 4 + 500
+
+    async def acquire(self, user_id: str, message: str):
+        """Block until both the user's and the worker's budgets allow another workflow call"""
+        self._evict_idle_buckets()
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self._user_buckets[user_id] = TokenBucket(self.user_requests_per_minute)
+        else:
+            self._user_buckets.move_to_end(user_id)
+
+        waited = await bucket.acquire()
+        waited += await self._worker_bucket.acquire(self.estimate_tokens(message))
+        if waited:
+            logger.info(f"Rate limited user {user_id} for {waited:.2f}s")
+
+    def _evict_idle_buckets(self):
+        """Drop idle user buckets from the least recently used end; a returning user starts a fresh one"""
+        now = time.monotonic()
+        while self._user_buckets and next(iter(self._user_buckets.values())).is_idle(now):
+            self._user_buckets.popitem(last=False)
+
+# Global rate limit service instance
+rate_limit_service = RateLimitService(
+    user_requests_per_minute=settings.rate_limit_requests * 60 / settings.rate_limit_window,
+    requests_per_minute=settings.llm_requests_per_minute / settings.llm_workers,
+    tokens_per_minute=settings.llm_tokens_per_minute / settings.llm_workers
+)
@@ -0,0 +1,145 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from langchain_openai import OpenAIEmbeddings
+
+from ..config.service_config import settings
+from ..models.agent_models import Message
+from ..tools.sql_retrieval_tool import get_account_balance, get_transactions, get_credit_card_info
+from ..utils.logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Tools that read live customer data - answers built from them go stale and are never cached
+USER_DATA_TOOLS = frozenset(tool.name for tool in (get_account_balance, get_transactions, get_credit_card_info))
+
+# Messages quoting amounts or account numbers differ in exactly the part embeddings blur over
+_NUMBER_PATTERN = re.compile(r"\d")
+
+class ResponseCacheService:
+    """In-process TTL cache of workflow results keyed by SHA256(scope | message | model).
+    
+    The scope (see make_scope) covers everything besides the message that the answer depends on.
+    A second, semantic tier matches paraphrases: each cached message's embedding is kept per
+    scope and a new message reuses the closest entry within the cosine distance threshold.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 1024, semantic_threshold: Optional[float] = 0.1,
+                 min_score: int = 4):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.semantic_threshold = semantic_threshold  # max cosine distance; None disables the tier
+        self.min_score = min_score  # judge overall_score (1-5) an answer needs to be cached
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, result, scope)
+        self._vectors: Dict[str, Dict[str, np.ndarray]] = {}  # scope -> {key: unit vector}
+        self._embeddings: Optional[OpenAIEmbeddings] = None
+
+    def make_scope(self, user_id: str, chat_thread_id: str, history: Sequence[Message]) -> str:
+        """Digest of the user and the conversation an answer was given in.
+        
+        A thread without history only depends on the user, so first questions are shared by all of
+        the user's new threads; later turns are tied to their thread and the messages so far.
+        """
+        digest = hashlib.sha256(user_id.encode())
+        if history:
+            digest.update(f"\0{chat_thread_id}".encode())
+            for msg in history:
+                digest.update(f"\0{msg.role}\0{msg.content}".encode())
+        return digest.hexdigest()
+
+    def make_key(self, scope: str, message: str) -> str:
+        """Deterministic key for a message in a scope under the current model"""
+        raw = f"{scope}|{message.strip().lower()}|{settings.openai_model}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result, or None when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result, _ = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def set(self, key: str, result: Dict[str, Any], scope: Optional[str] = None, embedding: Optional[np.ndarray] = None):
+        """Store a result, evicting the least recently used entry when full.
+        
+        Passing the scope and message embedding also makes the entry reachable by get_similar.
+        """
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result, scope)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        
+        if scope is not None and embedding is not None:
+            self._vectors.setdefault(scope, {})[key] = embedding
+
+    def has_vectors(self, scope: str) -> bool:
+        """Whether get_similar has anything to compare against in this scope"""
+        return scope in self._vectors
+
+    async def embed(self, message: str) -> Optional[np.ndarray]:
+        """Unit-length embedding of a message, or None when the semantic tier can't be used"""
+        if self.semantic_threshold is None or _NUMBER_PATTERN.search(message):
+            return None
+        if self._embeddings is None:
+            self._embeddings = OpenAIEmbeddings(
+                model=settings.openai_embedding_model,
+                api_key=settings.openai_api_key
+            )
+        try:
+            vector = np.asarray(await self._embeddings.aembed_query(message.strip().lower()), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Could not embed message for semantic cache: {str(e)}")
+            return None
+        return vector / np.linalg.norm(vector)
+
+    def get_similar(self, scope: str, embedding: Optional[np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Return the scope's cached result closest to the embedding if within the threshold"""
+        vectors = self._vectors.get(scope)
+        if embedding is None or not vectors:
+            return None
+        
+        keys = list(vectors)
+        similarities = np.stack(list(vectors.values())) @ embedding
+        best = int(np.argmax(similarities))
+        if 1.0 - float(similarities[best]) > self.semantic_threshold:
+            return None
+        return self.get(keys[best])
+
+    def is_cacheable(self, result: Dict[str, Any]) -> bool:
+        """Only successful answers the judge passed that did not touch live account data are safe to replay"""
+        evaluation = result.get("evaluation") or {}
+        return (
+            result.get("success", False)
+            and evaluation.get("overall_score", 0) >= self.min_score
+            and USER_DATA_TOOLS.isdisjoint(result.get("tools_used", []))
+        )
+
+    def _drop(self, key: str):
+        """Remove an entry together with its vector; scopes left without vectors are removed too"""
+        _, _, scope = self._entries.pop(key)
+        vectors = self._vectors.get(scope)
+        if vectors is not None:
+            vectors.pop(key, None)
+            if not vectors:
+                del self._vectors[scope]
+
+    def clear(self):
+        self._entries.clear()
+        self._vectors.clear()
+
+# Global response cache instance
+response_cache = ResponseCacheService(
+    ttl_seconds=settings.response_cache_ttl,
+    max_entries=settings.response_cache_max_entries,
+    semantic_threshold=settings.semantic_cache_threshold,
+    min_score=settings.response_cache_min_score
+)
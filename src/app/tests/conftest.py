@@ -4,20 +4,35 @@ Shared test configuration and fixtures for Banking Bot tests.
 This module provides common setup, fixtures, and utilities used across all test modules.
 """
 
+import ast
+import hashlib
+import itertools
 import pytest
 import sys
 import os
+import pickle
+import sqlite3
+import uuid
 from pathlib import Path
 from typing import Dict, Any, List
 import asyncio
 from datetime import datetime
+from functools import lru_cache
+
+import orjson
+from pytest_asyncio import is_async_test
 
 # Add project root to path for imports
 PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.app.database.database import get_db
-from src.app.models.database_models import User, Account, Transaction, CreditCard
+from src.app.database.database import DATABASE_PATH, SessionLocal, create_schema, engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy.pool import NullPool
+
+from src.app.models.database_models import User
 
 # Test configuration
 TEST_CONFIG = {
@@ -28,7 +43,9 @@ TEST_CONFIG = {
     "agent_timeout": 30.0,
     "expected_accounts": 2,
     "expected_transactions_min": 50,
-    "expected_credit_cards": 1
+    "expected_credit_cards": 1,
+    # Derive thread IDs and uuid4() values from the test node ID so reruns replay identically
+    "deterministic": os.getenv("BANKINGBOT_DETERMINISTIC") == "1"
 }
 
 @pytest.fixture(scope="session")
@@ -37,57 +54,303 @@ def test_config():
     return TEST_CONFIG
 
 @pytest.fixture(scope="session")
-def database_connection():
-    """Provide database connection for tests."""
+def reference_now():
+    """Wall-clock "now" taken once per session, so date checks agree across tests."""
+    return datetime.now()
+
+# pytest cache entry naming the database whose schema an earlier run created (see --reuse-db)
+_DB_READY_KEY = "bankingbot/db_ready"
+
+@pytest.fixture(scope="session")
+def database_engine(request):
+    """Engine the tests run against, with the current schema applied to it.
+    
+    For SQLite, the seeded file is copied into an in-memory database once per process and the
+    schema is brought up to date on that copy, so tests never write to the repo's data/
+    directory and each pytest-xdist worker has its own copy. Other backends run against the
+    configured database; there --reuse-db skips the schema step while the pytest cache records
+    that an earlier run prepared the same database, and --create-db forces it after model changes.
+    """
+    if engine.dialect.name != "sqlite":
+        # .pytest_cache outlives the run and is shared by its xdist workers; None under -p no:cacheprovider
+        cache = getattr(request.config, "cache", None)
+        database = engine.url.render_as_string(hide_password=True)
+        reuse = (request.config.getoption("reuse_db") and not request.config.getoption("create_db")
+                 and cache is not None and cache.get(_DB_READY_KEY, None) == database)
+        if not reuse:
+            # xdist workers race to create missing tables; a retry sees the other worker's tables.
+            # SQLite reports the clash as OperationalError, Postgres as IntegrityError (pg_type)
+            # or ProgrammingError (DuplicateTable)
+            for attempt in range(3):
+                try:
+                    create_schema(engine)
+                    break
+                except (OperationalError, IntegrityError, ProgrammingError):
+                    if attempt == 2:
+                        raise
+            if cache is not None:
+                cache.set(_DB_READY_KEY, database)
+        yield engine
+        return
+    
+    # A shared-cache memory database lives as long as one connection to it is open
+    memory_uri = "file:banking_bot_test?mode=memory&cache=shared"
+    keeper = sqlite3.connect(memory_uri, uri=True, check_same_thread=False)
+    if DATABASE_PATH.exists():
+        # The backup API includes pages still in the WAL file, unlike a plain file copy
+        with sqlite3.connect(f"file:{DATABASE_PATH}?mode=ro", uri=True) as source:
+            source.backup(keeper)
+    
+    # pysqlite defers BEGIN and mishandles SAVEPOINTs, so let SQLAlchemy emit BEGIN itself.
+    # Each checkout opens its own connection to the shared copy, so the tools' sessions can run
+    # while a database_connection transaction is open.
+    test_engine = create_engine(
+        f"sqlite+pysqlite:///{memory_uri}&uri=true",
+        poolclass=NullPool,
+        connect_args={"check_same_thread": False}
+    )
+    
+    @event.listens_for(test_engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(test_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
+    create_schema(test_engine)
+    # Give the query planner row statistics for the copy
+    keeper.execute("ANALYZE")
+    
+    yield test_engine
+    test_engine.dispose()
+    keeper.close()
+
+@pytest.fixture(scope="session", autouse=True)
+def _app_sessions_on_test_engine(database_engine):
+    """Bind the app's SessionLocal to the test engine, so the tools read the same data as the tests."""
+    SessionLocal.configure(bind=database_engine)
+    yield
+    SessionLocal.configure(bind=engine)
+
+def _raise_on_lazy_load(orm_execute_state):
+    """Add raiseload("*") to ORM SELECTs; explicit loader options still win for their paths."""
+    if (orm_execute_state.is_select and not orm_execute_state.is_column_load
+            and not orm_execute_state.is_relationship_load):
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+def enable_strict_loading(db: Session) -> Session:
+    """Make any relationship access that was not eagerly loaded raise instead of querying."""
+    event.listen(db, "do_orm_execute", _raise_on_lazy_load)
+    return db
+
+@pytest.fixture
+def database_connection(request, database_engine):
+    """Provide a session whose changes are rolled back after each test.
+    
+    The session joins an outer transaction on its own connection; commits inside the test only
+    release a SAVEPOINT, so nothing a test writes outlives it. With --strict-loading, lazy
+    relationship loads raise so N+1 query patterns fail the test.
+    """
+    connection = database_engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    if request.config.getoption("strict_loading"):
+        enable_strict_loading(db)
     try:
-        db = next(get_db())
         yield db
     finally:
         db.close()
+        transaction.rollback()
+        connection.close()
+
+@pytest.fixture
+def strict_loading(database_connection):
+    """database_connection with lazy relationship loads turned into errors for this test."""
+    if not database_connection.dispatch.do_orm_execute:
+        enable_strict_loading(database_connection)
+    return database_connection
 
 @pytest.fixture(scope="session")
-def test_user_data(database_connection):
-    """Get test user data from database."""
-    db = database_connection
-    user = db.query(User).filter(User.user_id == TEST_CONFIG["test_user_id"]).first()
-    
-    if not user:
-        pytest.skip(f"Test user {TEST_CONFIG['test_user_id']} not found in database")
+def _test_user_data_cached(database_engine):
+    """Load the test user's data once per session and keep it detached from any session."""
+    db = Session(bind=database_engine)
+    try:
+        # Load the user, then accounts and credit cards with one IN query each
+        user = db.query(User).options(
+            selectinload(User.accounts),
+            selectinload(User.credit_cards)
+        ).filter(User.user_id == TEST_CONFIG["test_user_id"]).one_or_none()
+        
+        if not user:
+            pytest.skip(f"Test user {TEST_CONFIG['test_user_id']} not found in database")
+        
+        accounts = tuple(acc for acc in user.accounts if acc.is_active)
+        data = {
+            "user": user,
+            "accounts": accounts,
+            "credit_cards": tuple(card for card in user.credit_cards if card.is_active),
+            "account_numbers": tuple(acc.account_number for acc in accounts),
+            "total_balance": sum(acc.balance for acc in accounts)
+        }
+        # Everything needed is loaded; detach it so no connection is held for the session
+        db.expunge_all()
+        return data
+    finally:
+        db.close()
+
+@pytest.fixture
+def test_user_data(_test_user_data_cached):
+    """Get test user data from database (queried once per session, a fresh dict per test)."""
+    return dict(_test_user_data_cached)
+
+@pytest.fixture(scope="session")
+def tool_outputs(_test_user_data_cached):
+    """Parsed output of each SQL tool for the test user, invoked once per session.
     
-    accounts = db.query(Account).filter(Account.user_id == user.id, Account.is_active == True).all()
-    transactions = db.query(Transaction).join(Account).filter(Account.user_id == user.id).all()
-    credit_cards = db.query(CreditCard).filter(CreditCard.user_id == user.id, CreditCard.is_active == True).all()
+    get_transactions is called with limit=5. Tests that need other arguments, error cases
+    or timings invoke the tools themselves.
+    """
+    from src.app.tools.sql_retrieval_tool import get_account_balance, get_transactions, get_credit_card_info
     
+    user_id = _test_user_data_cached["user"].user_id
     return {
-        "user": user,
-        "accounts": accounts,
-        "transactions": transactions,
-        "credit_cards": credit_cards,
-        "account_numbers": [acc.account_number for acc in accounts],
-        "total_balance": sum(acc.balance for acc in accounts)
+        "get_account_balance": validate_json_response(get_account_balance.invoke({"user_id": user_id})),
+        "get_transactions": validate_json_response(get_transactions.invoke({"user_id": user_id, "limit": 5})),
+        "get_credit_card_info": validate_json_response(get_credit_card_info.invoke({"user_id": user_id}))
     }
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def banking_agent():
-    """Provide banking agent instance for tests."""
+    """Provide banking agent instance shared by all test modules."""
     # Lazy import to avoid warnings in non-agent tests
     from src.app.agents.banking_agent import BankingAgent
     return BankingAgent()
 
+@pytest.fixture(scope="session")
+def _agent_response_cache():
+    """Recorded stream_response events keyed by (user_id, message), shared by the whole session."""
+    return {}
+
+@pytest.fixture(autouse=True)
+def cache_agent_responses(request, monkeypatch, _agent_response_cache):
+    """Replay recorded agent streams for repeated prompts instead of calling the LLM again.
+    
+    Tests that depend on fresh conversation state opt out with @pytest.mark.no_chat_cache;
+    stubbed runs are never recorded.
+    """
+    if ("banking_agent" not in request.fixturenames or "stub_llm" in request.fixturenames
+            or request.node.get_closest_marker("no_chat_cache")):
+        yield
+        return
+    
+    from src.app.agents.banking_agent import BankingAgent
+    original = BankingAgent.stream_response
+    
+    async def cached_stream_response(self, message, thread_id, user_id):
+        key = (user_id, message)
+        events = _agent_response_cache.get(key)
+        if events is None:
+            events = [evt async for evt in original(self, message, thread_id, user_id)]
+            # Failed runs are not worth replaying
+            if not any(evt["type"] == "error" for evt in events):
+                _agent_response_cache[key] = events
+        for evt in events:
+            yield {**evt, "chat_thread_id": thread_id} if "chat_thread_id" in evt else evt
+    
+    monkeypatch.setattr(BankingAgent, "stream_response", cached_stream_response)
+    yield
+
+@pytest.fixture
+def stub_llm(banking_agent, monkeypatch):
+    """Replace the agent's LangGraph run with a canned, LLM-free event sequence.
+    
+    For tests that only check control flow and response structure, not answer quality.
+    """
+    from langchain_core.messages import AIMessage, ToolMessage
+    
+    async def fake_astream_events(inputs, config=None, version="v2"):
+        answer = AIMessage(content="I was unable to find balance information for this request.")
+        tool_result = ToolMessage(
+            content='{"error": "unable to find balance"}',
+            name="get_account_balance",
+            tool_call_id="stub_call"
+        )
+        yield {"event": "on_chat_model_start", "name": "stub_llm", "data": {}}
+        yield {"event": "on_tool_start", "name": "get_account_balance", "data": {"name": "get_account_balance", "input": {}}}
+        yield {"event": "on_tool_end", "name": "get_account_balance", "data": {"output": tool_result}}
+        yield {"event": "on_chain_end", "name": "LangGraph", "data": {"output": {"messages": [*inputs["messages"], answer]}}}
+    
+    monkeypatch.setattr(banking_agent.agent, "astream_events", fake_astream_events)
+    return banking_agent
+
 @pytest.fixture
-def test_thread_id():
+def cached_chat(request, banking_agent):
+    """Async chat callable whose replies persist under .pytest_cache/agent_replies between runs.
+    
+    Stored replies are only read back when AGENT_CACHE is set; `pytest --cache-clear` drops them.
+    """
+    cache = getattr(request.config, "cache", None)  # None under -p no:cacheprovider
+    cache_dir = cache.mkdir("agent_replies") if cache is not None else None
+    
+    async def _chat(message: str, user_id: str, chat_thread_id: str) -> Dict[str, Any]:
+        reply_path = None
+        if cache_dir is not None:
+            key = hashlib.sha1(f"{request.node.nodeid}|{message}|{user_id}".encode()).hexdigest()
+            reply_path = cache_dir / f"{key}.pkl"
+            if os.getenv("AGENT_CACHE") and reply_path.exists():
+                return pickle.loads(reply_path.read_bytes())
+        
+        [result] = await banking_agent.chat_batch(
+            [{"message": message, "user_id": user_id, "chat_thread_id": chat_thread_id}]
+        )
+        if reply_path is not None:
+            reply_path.write_bytes(pickle.dumps(result))
+        return result
+    
+    return _chat
+
+@pytest.fixture(autouse=True)
+def _reset_agent_state(request):
+    """Reset the shared agent's per-turn ReAct state after each test that used it."""
+    yield
+    agent = request.node.funcargs.get("banking_agent")
+    if agent is None:
+        return
+    agent.current_step = 0
+    agent.current_state = None
+    agent._final_answer_emitted = False
+
+def _node_seed(request) -> int:
+    """Stable 128-bit seed for the current test (hash() is salted per process)."""
+    return int.from_bytes(hashlib.sha256(request.node.nodeid.encode()).digest()[:16], "big")
+
+@pytest.fixture(autouse=True)
+def deterministic_ids(monkeypatch, request):
+    """Make uuid.uuid4() a per-test deterministic sequence when BANKINGBOT_DETERMINISTIC=1."""
+    if not TEST_CONFIG["deterministic"]:
+        return
+    seed = _node_seed(request)
+    counter = itertools.count()
+    monkeypatch.setattr(uuid, "uuid4", lambda: uuid.UUID(int=seed ^ next(counter), version=4))
+
+@pytest.fixture
+def test_thread_id(request):
     """Generate unique test thread ID."""
+    if TEST_CONFIG["deterministic"]:
+        return f"{TEST_CONFIG['test_thread_prefix']}{_node_seed(request):032x}"
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     return f"{TEST_CONFIG['test_thread_prefix']}{timestamp}"
 
 # Helper functions for tests
 def validate_json_response(response_str: str) -> Dict[str, Any]:
-    """Validate and parse JSON response from tools."""
+    """Validate and parse JSON response from tools (Python dict reprs are accepted as a fallback)."""
+    if not isinstance(response_str, (str, bytes)):
+        return response_str
     try:
-        return eval(response_str) if isinstance(response_str, str) else response_str
-    except:
-        import json
-        return json.loads(response_str)
+        return orjson.loads(response_str)
+    except orjson.JSONDecodeError:
+        return ast.literal_eval(response_str if isinstance(response_str, str) else response_str.decode())
 
 def assert_tool_success(result: Dict[str, Any], expected_keys: List[str]):
     """Assert that tool result is successful and contains expected keys."""
@@ -113,15 +376,16 @@ def get_valid_test_parameters():
         "transaction_type": "debit"
     }
 
+@lru_cache(maxsize=None)
 def get_invalid_test_parameters():
-    """Get invalid test parameters for validation testing."""
-    return [
+    """Get invalid test parameters for validation testing (built once and shared, so don't modify them)."""
+    return (
         {"user_id": ""},  # Empty user_id
         {"user_id": "user_id"},  # Placeholder user_id
         {"user_id": "your_user_id"},  # Another placeholder
         {"user_id": "placeholder"},  # Generic placeholder
         {"user_id": None},  # None user_id
-    ]
+    )
 
 # Test categories for organization
 class TestCategories:
@@ -135,6 +399,15 @@ class TestCategories:
 # Pytest markers for test categorization
 pytest_plugins = []
 
+def pytest_addoption(parser):
+    """Database bootstrap options."""
+    parser.addoption("--reuse-db", action="store_true", default=False,
+                     help="Skip schema creation on a non-SQLite test database a previous run left ready")
+    parser.addoption("--create-db", action="store_true", default=False,
+                     help="Force schema creation even with --reuse-db (use after model changes)")
+    parser.addoption("--strict-loading", action="store_true", default=False,
+                     help="Raise on lazy relationship loads in database_connection sessions")
+
 def pytest_configure(config):
     """Configure pytest with custom markers."""
     config.addinivalue_line("markers", "unit: Unit tests for individual components")
@@ -144,6 +417,26 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "agent: End-to-end agent behavior tests")
     config.addinivalue_line("markers", "performance: Performance and load tests")
     config.addinivalue_line("markers", "slow: Tests that take more than 5 seconds")
+    config.addinivalue_line("markers", "no_chat_cache: Always run the agent instead of replaying cached responses")
+    config.addinivalue_line("markers", "stub_llm: Tests run against the canned stub_llm events; no API calls")
+
+def pytest_collection_modifyitems(config, items):
+    """Record each test's category markers so JUnit XML reports can be split per category.
+    
+    Async tests also share one session event loop, so the LLM and database clients keep
+    their connection pools between tests. Tests using the stub_llm fixture get the stub_llm
+    marker, so `-m stub_llm` (or `-k stub`) runs just the offline agent tests.
+    """
+    categories = {value for name, value in vars(TestCategories).items() if name.isupper()}
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if "stub_llm" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.stub_llm)
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+        marked = sorted({marker.name for marker in item.iter_markers()} & categories)
+        if marked:
+            item.user_properties.append(("categories", ",".join(marked)))
 
 # Test data for consistent testing
 SAMPLE_TEST_MESSAGES = [
@@ -7,127 +7,118 @@ configurations and generates comprehensive reports.
 
 import os
 import sys
+import importlib.util
+import xml.etree.ElementTree as ET
+from collections import Counter
 import pytest
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+
+# Categories run together by `--type all`
+DEFAULT_CATEGORIES = ["unit", "integration", "validation", "database", "agent"]
+
+# pytest-cov options shared by the combined test + coverage run and the standalone report
+COVERAGE_ARGS = ["--cov=src", "--cov-report=html", "--cov-report=term", "--cov-config=.coveragerc"]
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 
+class _MarkerCounter:
+    """pytest plugin that tallies how many collected tests carry each marker."""
+    
+    def __init__(self):
+        self.counts = Counter()
+    
+    def pytest_collection_modifyitems(self, items):
+        for item in items:
+            self.counts.update({marker.name for marker in item.iter_markers()})
+
+
 class BankingBotTestRunner:
     """Comprehensive test runner for banking bot."""
     
-    def __init__(self):
+    # --type value -> (emoji, label, pytest marker)
+    CATEGORIES = {
+        "unit": ("🧪", "Unit Tests", "unit"),
+        "integration": ("🔗", "Integration Tests", "integration"),
+        "validation": ("✅", "Validation Tests", "validation"),
+        "database": ("🗄️ ", "Database Tests", "database"),
+        "agent": ("🤖", "Agent Tests", "agent"),
+        "performance": ("⚡", "Performance Tests", "performance"),
+    }
+    
+    def __init__(self, workers: Union[int, str] = "auto", max_processes: Optional[int] = None):
         self.test_dir = Path(__file__).parent
+        self._test_dir_str = os.fspath(self.test_dir)
+        self._common = ("-v", "--tb=short", "--durations=10")  # shared by the per-category runs
         self.results = {}
-        
-    def run_unit_tests(self) -> Dict[str, Any]:
-        """Run unit tests."""
-        print("🧪 Running Unit Tests...")
-        result = pytest.main([
-            str(self.test_dir),
-            "-m", "unit",
-            "-v",
-            "--tb=short",
-            "--durations=10"
-        ])
-        
-        self.results['unit'] = {
-            'exit_code': result,
-            'timestamp': datetime.now().isoformat()
-        }
-        return self.results['unit']
+        self.workers = workers  # pytest-xdist worker count, "auto" = one per CPU, 0 = run serially
+        self.max_processes = max_processes  # upper bound on "auto" to cap memory use
+        self._marker_counts: Optional[Counter] = None  # filled by the first _collect_markers()
     
-    def run_integration_tests(self) -> Dict[str, Any]:
-        """Run integration tests."""
-        print("🔗 Running Integration Tests...")
-        result = pytest.main([
-            str(self.test_dir),
-            "-m", "integration",
-            "-v",
-            "--tb=short",
-            "--durations=10"
-        ])
-        
-        self.results['integration'] = {
-            'exit_code': result,
-            'timestamp': datetime.now().isoformat()
-        }
-        return self.results['integration']
+    def _now(self) -> str:
+        """Result timestamp; seconds resolution is all the summary shows"""
+        return datetime.now().isoformat(timespec="seconds")
     
-    def run_validation_tests(self) -> Dict[str, Any]:
-        """Run validation tests."""
-        print("✅ Running Validation Tests...")
-        result = pytest.main([
-            str(self.test_dir),
-            "-m", "validation",
-            "-v",
-            "--tb=short",
-            "--durations=10"
-        ])
+    def _run_pytest(self, args: List[str]) -> int:
+        """Run pytest in-process with the parallel options; all test runs go through here.
         
-        self.results['validation'] = {
-            'exit_code': result,
-            'timestamp': datetime.now().isoformat()
-        }
-        return self.results['validation']
+        A Config can't be reused between runs (pytest re-registers its session and reporter
+        plugins on each run), so each call builds a fresh one. The app and test modules imported
+        by the first run stay in sys.modules, which is where most of the startup time goes.
+        On CI the .pytest_cache is skipped unless the run needs last-failed information.
+        """
+        if os.environ.get("CI") == "true" and "--lf" not in args:
+            args = ["-p", "no:cacheprovider", *args]
+        return pytest.main([*self._parallel_args(), *args])
     
-    def run_database_tests(self) -> Dict[str, Any]:
-        """Run database tests."""
-        print("🗄️  Running Database Tests...")
-        result = pytest.main([
-            str(self.test_dir),
-            "-m", "database",
-            "-v",
-            "--tb=short",
-            "--durations=10"
-        ])
+    def _parallel_args(self) -> List[str]:
+        """pytest-xdist arguments; tests are spread individually, and each worker gets its own
+        in-memory SQLite copy (see conftest.py), so no test needs to share a worker with another"""
+        if str(self.workers) == "0" or importlib.util.find_spec("xdist") is None:
+            return []
+        args = ["-n", str(self.workers), "--dist=load"]
+        if self.max_processes:
+            args.append(f"--maxprocesses={self.max_processes}")
+        return args
         
-        self.results['database'] = {
-            'exit_code': result,
-            'timestamp': datetime.now().isoformat()
-        }
-        return self.results['database']
+    def _collect_markers(self) -> Counter:
+        """Count tests per marker with one collect-only pass, cached for the runner's lifetime."""
+        if self._marker_counts is None:
+            counter = _MarkerCounter()
+            pytest.main([self._test_dir_str, "--collect-only", "-qq", "--no-header"], plugins=[counter])
+            self._marker_counts = counter.counts
+        return self._marker_counts
     
-    def run_agent_tests(self) -> Dict[str, Any]:
-        """Run agent tests."""
-        print("🤖 Running Agent Tests...")
-        result = pytest.main([
-            str(self.test_dir),
-            "-m", "agent",
-            "-v",
-            "--tb=short",
-            "--durations=10"
-        ])
+    def _run(self, key: str) -> Dict[str, Any]:
+        """Run one marker category from CATEGORIES."""
+        emoji, label, marker = self.CATEGORIES[key]
+        if self._collect_markers()[marker] == 0:
+            print(f"{emoji} No {label} found, skipping")
+            self.results[key] = {
+                'exit_code': pytest.ExitCode.NO_TESTS_COLLECTED,
+                'timestamp': self._now()
+            }
+            return self.results[key]
         
-        self.results['agent'] = {
-            'exit_code': result,
-            'timestamp': datetime.now().isoformat()
-        }
-        return self.results['agent']
-    
-    def run_performance_tests(self) -> Dict[str, Any]:
-        """Run performance tests."""
-        print("⚡ Running Performance Tests...")
-        result = pytest.main([
-            str(self.test_dir),
-            "-m", "performance",
-            "-v",
-            "--tb=short",
-            "--durations=10"
+        print(f"{emoji} Running {label}...")
+        result = self._run_pytest([
+            self._test_dir_str,
+            "-m", marker,
+            *self._common
         ])
         
-        self.results['performance'] = {
+        self.results[key] = {
             'exit_code': result,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._now()
         }
-        return self.results['performance']
+        return self.results[key]
     
-    def run_all_tests(self, include_slow=False) -> Dict[str, Any]:
+    def run_all_tests(self, include_slow=False, coverage=False) -> Dict[str, Any]:
         """Run all tests."""
         print("🚀 Running All Banking Bot Tests...")
         
@@ -137,7 +128,8 @@ class BankingBotTestRunner:
             markers.append("not slow")
         
         args = [
-            str(self.test_dir),
+            *(COVERAGE_ARGS if coverage else []),
+            self._test_dir_str,
             "-v",
             "--tb=short",
             "--durations=20",
@@ -147,30 +139,92 @@ class BankingBotTestRunner:
         if markers:
             args.extend(["-m", " and ".join(markers)])
         
-        result = pytest.main(args)
+        result = self._run_pytest(args)
         
         self.results['all'] = {
             'exit_code': result,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self._now(),
             'include_slow': include_slow
         }
         return self.results['all']
     
+    def run_categories(self, categories: List[str], include_slow: bool = False,
+                       coverage: bool = False) -> Dict[str, Any]:
+        """Run several marker categories in one pytest session and split the results per category.
+        
+        Collection and conftest setup happen once instead of once per category; the per-test
+        category properties recorded by conftest.py are read back from the JUnit XML report.
+        With coverage=True the same run also produces the coverage report.
+        """
+        print(f"🚀 Running {', '.join(categories)} Tests...")
+        report_path = self.test_dir / ".pytest_report.xml"
+        
+        marker_expr = "(" + " or ".join(categories) + ")"
+        if not include_slow:
+            marker_expr += " and not slow"
+        
+        result = self._run_pytest([
+            *(COVERAGE_ARGS if coverage else []),
+            self._test_dir_str,
+            "-m", marker_expr,
+            "-v",
+            "--tb=short",
+            "--durations=20",
+            f"--junitxml={report_path}",
+            "-o", "junit_family=xunit2"
+        ])
+        
+        timestamp = self._now()
+        counts = {category: {'passed': 0, 'failed': 0, 'skipped': 0} for category in categories}
+        if report_path.exists():
+            for _, element in ET.iterparse(report_path):
+                if element.tag != "testcase":
+                    continue
+                if element.find("failure") is not None or element.find("error") is not None:
+                    outcome = 'failed'
+                elif element.find("skipped") is not None:
+                    outcome = 'skipped'
+                else:
+                    outcome = 'passed'
+                for prop in element.iter("property"):
+                    if prop.get("name") == "categories":
+                        for category in prop.get("value", "").split(","):
+                            if category in counts:
+                                counts[category][outcome] += 1
+                element.clear()
+            report_path.unlink()
+        
+        for category, count in counts.items():
+            self.results[category] = {
+                'exit_code': result if count['failed'] or result not in (0, 1) else 0,
+                'timestamp': timestamp,
+                **count
+            }
+        return {category: self.results[category] for category in categories}
+    
     def run_quick_tests(self) -> Dict[str, Any]:
-        """Run quick tests for continuous integration."""
+        """Run quick tests for continuous integration.
+        
+        Only the tests that failed last time are rerun while any are recorded in the pytest
+        cache; `--cache-clear` runs everything again. Outside CI, new test files run first.
+        """
         print("⚡ Running Quick Tests (CI/CD)...")
-        result = pytest.main([
-            str(self.test_dir),
+        result = self._run_pytest([
+            self._test_dir_str,
             "-m", "not slow and not performance",
-            "-v",
+            "--lf", "--ff",
+            *(["--nf"] if os.environ.get("CI") != "true" else []),
+            "-q",
             "--tb=line",
+            "--no-header",
+            "--no-summary",
             "--durations=5",
             "-x"  # Stop on first failure
         ])
         
         self.results['quick'] = {
             'exit_code': result,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._now()
         }
         return self.results['quick']
     
@@ -182,7 +236,7 @@ class BankingBotTestRunner:
             return {'exit_code': 2, 'error': 'File not found'}
         
         print(f"📁 Running tests from {test_file}...")
-        result = pytest.main([
+        result = self._run_pytest([
             str(test_path),
             "-v",
             "--tb=short"
@@ -190,54 +244,48 @@ class BankingBotTestRunner:
         
         self.results[test_file] = {
             'exit_code': result,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._now()
         }
         return self.results[test_file]
     
     def generate_coverage_report(self) -> None:
-        """Generate test coverage report."""
+        """Generate test coverage report (runs the non-slow suite under coverage)."""
         print("📊 Generating Coverage Report...")
         try:
-            result = pytest.main([
-                str(self.test_dir / ".."),  # Test the src directory
-                "--cov=src",
-                "--cov-report=html",
-                "--cov-report=term",
-                "--cov-config=.coveragerc",
-                "-m", "not slow"
-            ])
+            self.run_all_tests(coverage=True)
             print("✅ Coverage report generated in htmlcov/")
         except Exception as e:
             print(f"⚠️  Coverage report generation failed: {e}")
     
     def print_summary(self) -> None:
-        """Print test results summary."""
-        print("\n" + "="*60)
-        print("🏁 BANKING BOT TEST RESULTS SUMMARY")
-        print("="*60)
+        """Print test results summary (written in one call so it isn't interleaved with other output)."""
+        out = ["\n" + "="*60, "🏁 BANKING BOT TEST RESULTS SUMMARY", "="*60]
         
         if not self.results:
-            print("❌ No tests have been run")
+            out.append("❌ No tests have been run")
+            sys.stdout.write("\n".join(out) + "\n")
             return
         
         total_runs = len(self.results)
         successful_runs = sum(1 for r in self.results.values() if r.get('exit_code') == 0)
         
-        print(f"📊 Total test runs: {total_runs}")
-        print(f"✅ Successful runs: {successful_runs}")
-        print(f"❌ Failed runs: {total_runs - successful_runs}")
-        print(f"📈 Success rate: {(successful_runs/total_runs)*100:.1f}%")
-        
-        print("\n📋 Detailed Results:")
+        out += [
+            f"📊 Total test runs: {total_runs}",
+            f"✅ Successful runs: {successful_runs}",
+            f"❌ Failed runs: {total_runs - successful_runs}",
+            f"📈 Success rate: {(successful_runs/total_runs)*100:.1f}%",
+            "\n📋 Detailed Results:"
+        ]
         for test_type, result in self.results.items():
             status = "✅ PASS" if result.get('exit_code') == 0 else "❌ FAIL"
             timestamp = result.get('timestamp', 'Unknown')[:19]  # Remove microseconds
-            print(f"   {status} {test_type:20} - {timestamp}")
+            out.append(f"   {status} {test_type:20} - {timestamp}")
         
         if successful_runs == total_runs:
-            print("\n🎉 All tests passed successfully!")
+            out.append("\n🎉 All tests passed successfully!")
         else:
-            print("\n⚠️  Some tests failed. Please review the output above.")
+            out.append("\n⚠️  Some tests failed. Please review the output above.")
+        sys.stdout.write("\n".join(out) + "\n")
 
 
 def main():
@@ -245,18 +293,19 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="Banking Bot Test Runner")
-    parser.add_argument("--type", choices=[
-        "unit", "integration", "validation", "database", "agent", 
-        "performance", "all", "quick"
-    ], default="all", help="Type of tests to run")
+    parser.add_argument("--type", choices=[*BankingBotTestRunner.CATEGORIES, "all", "quick"],
+                        default="all", help="Type of tests to run")
     parser.add_argument("--file", help="Run specific test file")
     parser.add_argument("--slow", action="store_true", help="Include slow tests")
     parser.add_argument("--coverage", action="store_true", help="Generate coverage report")
     parser.add_argument("--summary", action="store_true", help="Show summary only")
+    parser.add_argument("--workers", default="auto",
+                        help="Parallel pytest-xdist workers ('auto' = one per CPU, 0 = serial)")
+    parser.add_argument("--max-processes", type=int, help="Cap on the number of xdist workers")
     
     args = parser.parse_args()
     
-    runner = BankingBotTestRunner()
+    runner = BankingBotTestRunner(workers=args.workers, max_processes=args.max_processes)
     
     print(f"🚀 Banking Bot Test Runner - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"📁 Test directory: {runner.test_dir}")
@@ -264,24 +313,15 @@ def main():
     
     if args.file:
         runner.run_specific_test_file(args.file)
-    elif args.type == "unit":
-        runner.run_unit_tests()
-    elif args.type == "integration":
-        runner.run_integration_tests()
-    elif args.type == "validation":
-        runner.run_validation_tests()
-    elif args.type == "database":
-        runner.run_database_tests()
-    elif args.type == "agent":
-        runner.run_agent_tests()
-    elif args.type == "performance":
-        runner.run_performance_tests()
+    elif args.type in runner.CATEGORIES:
+        runner._run(args.type)
     elif args.type == "quick":
         runner.run_quick_tests()
     elif args.type == "all":
-        runner.run_all_tests(include_slow=args.slow)
+        # Collect coverage during this run rather than running the suite a second time
+        runner.run_categories(DEFAULT_CATEGORIES, include_slow=args.slow, coverage=args.coverage)
     
-    if args.coverage:
+    if args.coverage and (args.file or args.type != "all"):
         runner.generate_coverage_report()
     
     if not args.summary:
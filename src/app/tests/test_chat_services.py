@@ -0,0 +1,507 @@
+"""
+Chat Service Testing Module
+
+This module tests the services behind the chat endpoints: the response cache,
+the rate limiter, ChatService and the history export. The workflow is stubbed,
+so no LLM is called.
+"""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, Any, List
+
+import httpx
+import numpy as np
+import orjson
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from ..api.endpoints import chat as chat_endpoints
+from ..database.database import Base, get_async_db
+from ..models.agent_models import Message
+from ..models.api_models import ChatMessage
+from ..models.database_models import ChatHistory, User
+from ..services import chat_service as chat_service_module
+from ..services import rate_limit_service as rate_limit_module
+from ..services.chat_service import chat_service
+from ..services.rate_limit_service import RateLimitService, TokenBucket
+from ..services.response_cache_service import ResponseCacheService
+from ..utils.auth_utils import AuthService
+
+
+def _unit(*values: float) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _answer(response: str = "Our branches open at 9am.", score: int = 5, **overrides) -> Dict[str, Any]:
+    """Workflow result as built by ChatService._run_workflow"""
+    return {
+        "response": response,
+        "tools_used": [],
+        "evaluation": {"overall_score": score, "confidence_level": "High"},
+        "success": True,
+        **overrides
+    }
+
+
+class TestResponseCache:
+    """Test suite for ResponseCacheService."""
+
+    @pytest.mark.unit
+    def test_get_returns_stored_result(self):
+        """Test that a stored result is returned for its key only."""
+        cache = ResponseCacheService()
+        key = cache.make_key(cache.make_scope("user_a", "thread_1", []), "What are your hours?")
+        result = _answer()
+
+        cache.set(key, result)
+
+        assert cache.get(key) is result
+        assert cache.get(cache.make_key(cache.make_scope("user_b", "thread_1", []), "What are your hours?")) is None
+
+    @pytest.mark.unit
+    def test_key_ignores_case_and_whitespace(self):
+        """Test that trivially different spellings of a message share a key."""
+        cache = ResponseCacheService()
+        scope = cache.make_scope("user_a", "thread_1", [])
+
+        assert cache.make_key(scope, "  What are your HOURS?") == cache.make_key(scope, "what are your hours?")
+
+    @pytest.mark.unit
+    def test_expired_entries_are_dropped(self):
+        """Test that entries are not served after their TTL."""
+        cache = ResponseCacheService(ttl_seconds=0)
+        cache.set("key", _answer())
+
+        assert cache.get("key") is None
+        assert "key" not in cache._entries
+
+    @pytest.mark.unit
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that a full cache evicts the entry that was used least recently."""
+        cache = ResponseCacheService(max_entries=2)
+        cache.set("first", _answer("1"))
+        cache.set("second", _answer("2"))
+        cache.get("first")  # "second" is now the least recently used
+        cache.set("third", _answer("3"))
+
+        assert cache.get("second") is None
+        assert cache.get("first")["response"] == "1"
+        assert cache.get("third")["response"] == "3"
+
+    @pytest.mark.unit
+    def test_scope_depends_on_conversation(self):
+        """Test that follow-ups are scoped to their thread and history, first questions are not."""
+        cache = ResponseCacheService()
+        history = [Message(role="user", content="Tell me about savings accounts", timestamp=datetime.now())]
+
+        assert cache.make_scope("user_a", "thread_1", []) == cache.make_scope("user_a", "thread_2", [])
+        assert cache.make_scope("user_a", "thread_1", history) != cache.make_scope("user_a", "thread_2", history)
+        assert cache.make_scope("user_a", "thread_1", history) != cache.make_scope("user_a", "thread_1", [])
+
+    @pytest.mark.unit
+    def test_get_similar_within_threshold(self):
+        """Test that a close paraphrase in the same scope reuses the cached result."""
+        cache = ResponseCacheService(semantic_threshold=0.1)
+        result = _answer()
+        cache.set("key", result, "scope_a", _unit(1.0, 0.0))
+
+        assert cache.get_similar("scope_a", _unit(1.0, 0.1)) is result
+        assert cache.get_similar("scope_a", _unit(0.0, 1.0)) is None
+        assert cache.get_similar("scope_b", _unit(1.0, 0.0)) is None
+        assert cache.get_similar("scope_a", None) is None
+
+    @pytest.mark.unit
+    def test_get_similar_skips_evicted_entries(self):
+        """Test that vectors whose entry is gone no longer match."""
+        cache = ResponseCacheService(max_entries=1)
+        cache.set("old", _answer("old"), "scope_a", _unit(1.0, 0.0))
+        cache.set("new", _answer("new"), "scope_b", _unit(0.0, 1.0))
+
+        assert cache.get_similar("scope_a", _unit(1.0, 0.0)) is None
+
+    @pytest.mark.unit
+    def test_storing_same_key_keeps_one_vector(self):
+        """Test that storing a key again replaces its vector instead of adding another."""
+        cache = ResponseCacheService()
+        cache.set("key", _answer("old"), "scope_a", _unit(1.0, 0.0))
+        cache.set("key", _answer("new"), "scope_a", _unit(1.0, 0.0))
+
+        assert list(cache._vectors["scope_a"]) == ["key"]
+        assert cache.get_similar("scope_a", _unit(1.0, 0.0))["response"] == "new"
+
+    @pytest.mark.unit
+    def test_eviction_drops_vectors(self):
+        """Test that evicted and expired entries take their vectors and empty scopes with them."""
+        cache = ResponseCacheService(max_entries=1)
+        cache.set("old", _answer("old"), "scope_a", _unit(1.0, 0.0))
+        cache.set("new", _answer("new"), "scope_b", _unit(0.0, 1.0))
+
+        assert not cache.has_vectors("scope_a")
+        assert cache.has_vectors("scope_b")
+
+        cache.ttl_seconds = 0
+        cache.set("new", _answer("new"), "scope_b", _unit(0.0, 1.0))
+        cache.get("new")
+
+        assert not cache._vectors
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("result,expected", [
+        (_answer(), True),
+        (_answer(score=3), False),
+        (_answer(evaluation=None), False),
+        (_answer(success=False), False),
+        (_answer(tools_used=["search_bank_documents"]), True),
+        (_answer(tools_used=["get_account_balance"]), False),
+    ], ids=["passed", "low_score", "no_evaluation", "failed", "documents", "account_data"])
+    def test_is_cacheable(self, result, expected):
+        """Test that only successful, judge-approved answers without live account data are cached."""
+        assert ResponseCacheService(min_score=4).is_cacheable(result) is expected
+
+
+class _StubAgent:
+    """Keeps per-thread history the way the agent's checkpointer does"""
+
+    def __init__(self):
+        self.threads: Dict[str, List[Message]] = {}
+        self.recorded: List[str] = []
+
+    def get_conversation_history(self, user_id: str, thread_id: str, limit: int = 50) -> List[Message]:
+        return list(self.threads.get(thread_id, []))[-limit:]
+
+    async def record_turn(self, message: str, response: str, thread_id: str, user_id: str):
+        self.recorded.append(message)
+        self._append(thread_id, message, response)
+
+    def _append(self, thread_id: str, message: str, response: str):
+        now = datetime.now()
+        self.threads.setdefault(thread_id, []).extend([
+            Message(role="user", content=message, timestamp=now),
+            Message(role="assistant", content=response, timestamp=now)
+        ])
+
+
+class _StubWorkflow:
+    """Replays a fixed chunk sequence in place of BankingWorkflow.stream_with_evaluation"""
+
+    def __init__(self, answer: str = "Our branches open at 9am.", score: int = 5, error: bool = False):
+        self.banking_agent = _StubAgent()
+        self.answer = answer
+        self.score = score
+        self.error = error
+        self.calls = 0
+
+    async def stream_with_evaluation(self, message: str, chat_thread_id: str, user_id: str):
+        self.calls += 1
+        yield {"type": "stream_start", "chat_thread_id": chat_thread_id}
+        if self.error:
+            yield {"type": "error", "content": "Error: upstream unavailable"}
+            return
+        yield {"type": "react_step", "phase": "ACTION", "details": {"tool_name": "search_bank_documents"}}
+        yield {"type": "react_step", "phase": "FINAL_ANSWER", "details": {"final_answer": self.answer}}
+        self.banking_agent._append(chat_thread_id, message, self.answer)
+        yield {"type": "evaluation_complete", "evaluation": {"overall_score": self.score, "confidence_level": "High"}}
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def chat_db():
+    """Async session on an empty in-memory database"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        yield db
+    await engine.dispose()
+
+
+@pytest.fixture
+def use_workflow(monkeypatch):
+    """Make the chat service use the given stub workflow"""
+    def _use(workflow: _StubWorkflow) -> _StubWorkflow:
+        monkeypatch.setattr(chat_service_module, "get_banking_workflow", lambda: workflow)
+        return workflow
+    return _use
+
+
+@pytest.fixture
+def user():
+    return User(id=1, user_id="chat_service_user")
+
+
+class TestProcessMessage:
+    """Test suite for ChatService.process_message with a stubbed workflow."""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        """Fresh response cache without the embedding tier"""
+        cache = ResponseCacheService(semantic_threshold=None)
+        monkeypatch.setattr(chat_service_module, "response_cache", cache)
+        return cache
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_answer_comes_from_workflow(self, chat_db, cache, use_workflow, user):
+        """Test that process_message runs the workflow and stores the exchange."""
+        workflow = use_workflow(_StubWorkflow())
+
+        response = await chat_service.process_message(ChatMessage(message="When do you open?"), user, chat_db)
+
+        assert workflow.calls == 1
+        assert response.response == "Our branches open at 9am."
+        assert response.tools_used == ["search_bank_documents"]
+        assert response.evaluation is not None and response.evaluation.overall_score == 5
+        assert await chat_db.scalar(select(func.count()).select_from(ChatHistory)) == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_first_question_replayed_in_new_thread(self, chat_db, cache, use_workflow, user):
+        """Test that a repeated first question is served from the cache and recorded in its thread."""
+        workflow = use_workflow(_StubWorkflow())
+
+        first = await chat_service.process_message(ChatMessage(message="When do you open?"), user, chat_db)
+        second = await chat_service.process_message(ChatMessage(message="When do you open?"), user, chat_db)
+
+        assert workflow.calls == 1
+        assert second.response == first.response
+        assert second.chat_thread_id != first.chat_thread_id
+        assert workflow.banking_agent.recorded == ["When do you open?"]
+        assert len(workflow.banking_agent.threads[second.chat_thread_id]) == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_follow_up_not_replayed_across_threads(self, chat_db, cache, use_workflow, user):
+        """Test that a follow-up is answered again when asked after a different conversation."""
+        workflow = use_workflow(_StubWorkflow())
+
+        for thread_id, opener in (("thread_a", "Tell me about savings accounts"), ("thread_b", "Tell me about loans")):
+            await chat_service.process_message(ChatMessage(message=opener, chat_thread_id=thread_id), user, chat_db)
+            await chat_service.process_message(
+                ChatMessage(message="What about the second one?", chat_thread_id=thread_id), user, chat_db
+            )
+
+        assert workflow.calls == 4
+        assert workflow.banking_agent.recorded == []
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_embedding_only_when_scope_has_vectors(self, chat_db, use_workflow, user, monkeypatch):
+        """Test that misses only pay for an embedding once something in their scope is cached."""
+        cache = ResponseCacheService(semantic_threshold=0.1)
+        monkeypatch.setattr(chat_service_module, "response_cache", cache)
+        embedded = []
+
+        async def fake_embed(message):
+            embedded.append(message)
+            return _unit(1.0, 0.0)
+
+        monkeypatch.setattr(cache, "embed", fake_embed)
+
+        workflow = use_workflow(_StubWorkflow(error=True))
+        await chat_service.process_message(ChatMessage(message="When do you open?"), user, chat_db)
+        assert embedded == []  # nothing cached to compare against, nothing worth storing
+
+        workflow = use_workflow(_StubWorkflow())
+        await chat_service.process_message(ChatMessage(message="When do you open?"), user, chat_db)
+        assert embedded == ["When do you open?"]  # embedded once, to store the answer
+
+        response = await chat_service.process_message(ChatMessage(message="What time do you open?"), user, chat_db)
+        assert embedded == ["When do you open?", "What time do you open?"]
+        assert workflow.calls == 1
+        assert response.response == "Our branches open at 9am."
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("workflow_args", [{"error": True}, {"score": 2}], ids=["error", "low_score"])
+    async def test_rejected_answers_not_cached(self, chat_db, cache, use_workflow, user, workflow_args):
+        """Test that failed and judge-rejected answers are not replayed."""
+        workflow = use_workflow(_StubWorkflow(**workflow_args))
+
+        for _ in range(2):
+            await chat_service.process_message(ChatMessage(message="When do you open?"), user, chat_db)
+
+        assert workflow.calls == 2
+        assert not cache._entries
+
+
+class _Clock:
+    """Fake monotonic clock; sleeping advances it instead of waiting"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        self.now += delay
+
+
+class TestRateLimiting:
+    """Test suite for the token buckets and their use by ChatService."""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Run the rate limit module on a fake clock (only that module's time/asyncio names are replaced)"""
+        clock = _Clock()
+        monkeypatch.setattr(rate_limit_module, "time", clock)
+        monkeypatch.setattr(rate_limit_module, "asyncio", SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+        return clock
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_burst_then_wait(self, clock):
+        """Test that a full bucket admits a minute's worth of requests, then one per interval."""
+        bucket = TokenBucket(requests_per_minute=60)
+
+        waits = [await bucket.acquire() for _ in range(60)]
+        assert waits == [0.0] * 60
+        assert await bucket.acquire() == pytest.approx(1.0)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_refill_is_continuous(self, clock):
+        """Test that tokens come back in proportion to the time passed, capped at the bucket size."""
+        bucket = TokenBucket(requests_per_minute=60)
+        for _ in range(60):
+            await bucket.acquire()
+
+        clock.now += 30
+        assert [await bucket.acquire() for _ in range(30)] == [0.0] * 30
+        assert await bucket.acquire() == pytest.approx(1.0)
+
+        clock.now += 3600
+        assert [await bucket.acquire() for _ in range(60)] == [0.0] * 60
+        assert await bucket.acquire() == pytest.approx(1.0)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_token_budget(self, clock):
+        """Test that the LLM token budget delays requests once spent."""
+        bucket = TokenBucket(requests_per_minute=600, tokens_per_minute=1200)
+
+        assert await bucket.acquire(1200) == 0.0
+        assert await bucket.acquire(600) == pytest.approx(30.0)  # 1200 tokens/minute = 20 per second
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_oversized_estimate_capped(self, clock):
+        """Test that an estimate above the whole budget waits for a full bucket instead of forever."""
+        bucket = TokenBucket(requests_per_minute=600, tokens_per_minute=1200)
+
+        assert await bucket.acquire(5000) == 0.0
+        assert await bucket.acquire(5000) == pytest.approx(60.0)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_idle_user_buckets_evicted(self, clock):
+        """Test that user buckets are dropped once idle long enough to be full again."""
+        service = RateLimitService(user_requests_per_minute=10, requests_per_minute=600, tokens_per_minute=100_000)
+
+        await service.acquire("user_a", "hello")
+        clock.now += 30
+        await service.acquire("user_b", "hello")
+        assert list(service._user_buckets) == ["user_a", "user_b"]
+
+        clock.now += 45  # user_a idle for 75s, user_b for 45s
+        await service.acquire("user_c", "hello")
+        assert list(service._user_buckets) == ["user_b", "user_c"]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_stream_message_is_rate_limited(self, chat_db, use_workflow, user, monkeypatch):
+        """Test that the streaming endpoint goes through the rate limiter before running the workflow."""
+        acquired = []
+
+        async def fake_acquire(user_id, message):
+            acquired.append((user_id, message))
+
+        monkeypatch.setattr(chat_service_module.rate_limit_service, "acquire", fake_acquire)
+        workflow = use_workflow(_StubWorkflow())
+
+        chunks = [chunk async for chunk in chat_service.stream_message(ChatMessage(message="When do you open?"), user, chat_db)]
+
+        assert acquired == [("chat_service_user", "When do you open?")]
+        assert workflow.calls == 1
+        assert not any(chunk["type"] == "error" for chunk in chunks)
+
+
+class TestHistoryExport:
+    """Test suite for the NDJSON chat history export endpoint."""
+
+    @pytest_asyncio.fixture(loop_scope="session")
+    async def client(self, chat_db, user):
+        """HTTP client for the chat router, authenticated as the test user, with five stored exchanges"""
+        start = datetime(2024, 1, 1, 9, 0)
+        chat_db.add_all([
+            ChatHistory(
+                user_id=user.id, chat_thread_id="export_thread", user_query=f"question {i}",
+                bot_response=f"answer {i}", created_at=start + timedelta(minutes=i)
+            )
+            for i in range(5)
+        ])
+        await chat_db.commit()
+
+        async def _db():
+            yield chat_db
+
+        app = FastAPI()
+        app.include_router(chat_endpoints.router)
+        app.dependency_overrides[get_async_db] = _db
+        app.dependency_overrides[AuthService.get_current_user] = lambda: user
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+    @staticmethod
+    def _lines(response: httpx.Response) -> List[Dict[str, Any]]:
+        return [orjson.loads(line) for line in response.content.splitlines()]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_pages_newest_first(self, client):
+        """Test that limit and offset page through the history newest first."""
+        first = await client.get("/chat/history/export", params={"limit": 2})
+        second = await client.get("/chat/history/export", params={"limit": 2, "offset": 2})
+
+        assert first.status_code == 200
+        assert [row["user_query"] for row in self._lines(first)] == ["question 4", "question 3"]
+        assert [row["user_query"] for row in self._lines(second)] == ["question 2", "question 1"]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("params", [
+        {"limit": chat_endpoints.EXPORT_MAX_ROWS + 1}, {"limit": 0}, {"offset": -1}
+    ], ids=["limit_too_large", "limit_zero", "negative_offset"])
+    async def test_rejects_bad_paging(self, client, params):
+        """Test that out-of-range limits and offsets are rejected before streaming starts."""
+        response = await client.get("/chat/history/export", params=params)
+
+        assert response.status_code == 400
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failure_mid_stream_ends_with_error_line(self, client, monkeypatch):
+        """Test that an export failing after the first row ends with an error marker instead of looking complete."""
+        original = chat_service.iter_chat_history
+
+        async def failing_iter(*args, **kwargs):
+            async for chat in original(*args, **kwargs):
+                yield chat
+                raise RuntimeError("database went away")
+
+        monkeypatch.setattr(chat_service, "iter_chat_history", failing_iter)
+
+        response = await client.get("/chat/history/export")
+
+        lines = self._lines(response)
+        assert response.status_code == 200
+        assert lines[0]["user_query"] == "question 4"
+        assert len(lines) == 2
+        assert lines[-1]["type"] == "error"
+        assert "database went away" in lines[-1]["message"]
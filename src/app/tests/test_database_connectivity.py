@@ -6,14 +6,31 @@ for the banking bot application.
 """
 
 import pytest
+import statistics
+import time
 from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from sqlalchemy.exc import SQLAlchemyError
+from datetime import timedelta
+from sqlalchemy import bindparam, create_engine, exists, func, insert, inspect, lambda_stmt, select, text
+from sqlalchemy.exc import InvalidRequestError, SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.pool import StaticPool
 
-from ..database.database import get_db
-from ..models.database_models import User, Account, Transaction, CreditCard
+from ..database.database import Base
+from ..models.api_models import FeedbackCreate
+from ..models.database_models import User, Account, Transaction, CreditCard, ChatHistory, Feedback
+from ..services import feedback_service as feedback_service_module
+from ..services.feedback_service import dedupe_feedback, ensure_feedback_unique_index, feedback_service
 from .conftest import TEST_CONFIG, TestCategories
 
+# Lookups shared by several tests; lambda_stmt caches the compiled SQL after the first run
+_USER_BY_USER_ID = lambda_stmt(lambda: select(User).where(User.user_id == bindparam("user_id")))
+# An IN over the user's account ids lets SQLite drive from ix_transactions_account_id
+_USER_TRANSACTIONS = lambda_stmt(
+    lambda: select(Transaction)
+    .where(Transaction.account_id.in_(select(Account.id).where(Account.user_id == bindparam("user_pk"))))
+    .limit(bindparam("limit"))
+)
+
 
 class TestDatabaseConnection:
     """Test database connectivity and basic operations."""
@@ -25,7 +42,7 @@ class TestDatabaseConnection:
         
         # Test a simple query
         try:
-            user_count = database_connection.query(User).count()
+            user_count = database_connection.scalar(select(func.count()).select_from(User))
             assert user_count >= 0, "Should be able to query user count"
         except SQLAlchemyError as e:
             pytest.fail(f"Database query failed: {e}")
@@ -35,29 +52,30 @@ class TestDatabaseConnection:
         """Test that all required database tables exist."""
         db = database_connection
         
-        # Test each model can be queried
+        # Check every model's table in one catalog lookup
         models_to_test = [User, Account, Transaction, CreditCard]
         
+        try:
+            existing_tables = set(inspect(db.connection()).get_table_names())
+        except SQLAlchemyError as e:
+            pytest.fail(f"Table lookup failed: {e}")
+        
         for model in models_to_test:
-            try:
-                count = db.query(model).count()
-                assert count >= 0, f"Should be able to query {model.__name__} table"
-            except SQLAlchemyError as e:
-                pytest.fail(f"Table {model.__name__} query failed: {e}")
+            assert model.__tablename__ in existing_tables, f"Table {model.__tablename__} should exist"
     
     @pytest.mark.database
     def test_database_schema_integrity(self, database_connection):
         """Test database schema integrity and relationships."""
         db = database_connection
         
-        # Test that we have test data
-        users = db.query(User).all()
+        # Test that we have test data (accounts for all users load in one extra query)
+        users = db.query(User).options(selectinload(User.accounts)).all()
         assert len(users) > 0, "Should have at least one user for testing"
         
         # Test user-account relationships
         for user in users:
-            accounts = db.query(Account).filter(Account.user_id == user.id).all()
-            # Users may or may not have accounts, but query should work
+            accounts = user.accounts
+            # Users may or may not have accounts, but the relationship should load
             assert isinstance(accounts, list), f"Should get list of accounts for user {user.user_id}"
             
             # If user has accounts, test account properties
@@ -67,6 +85,22 @@ class TestDatabaseConnection:
                 assert account.account_type is not None, "Account should have account type"
                 assert isinstance(account.balance, (int, float)), "Account balance should be numeric"
 
+    
+    @pytest.mark.database
+    def test_strict_loading_blocks_lazy_loads(self, strict_loading):
+        """Test that strict loading turns lazy relationship access into an error."""
+        db = strict_loading
+        
+        account = db.query(Account).first()
+        if account is None:
+            pytest.skip("No accounts in database")
+        with pytest.raises(InvalidRequestError):
+            account.user  # not eagerly loaded
+        
+        # Explicitly loaded relationships still work
+        account = db.query(Account).options(selectinload(Account.user)).first()
+        assert account.user is not None, "Eagerly loaded relationship should be available"
+
 
 class TestUserData:
     """Test user data integrity and availability."""
@@ -77,7 +111,7 @@ class TestUserData:
         db = database_connection
         test_user_id = TEST_CONFIG["test_user_id"]
         
-        user = db.query(User).filter(User.user_id == test_user_id).first()
+        user = db.execute(_USER_BY_USER_ID, {"user_id": test_user_id}).scalar_one_or_none()
         assert user is not None, f"Test user {test_user_id} should exist in database"
         
         # Verify user has required fields
@@ -98,8 +132,9 @@ class TestUserData:
             assert account.is_active is True, "Test accounts should be active"
             assert account.balance is not None, "Account should have balance"
             assert account.account_number is not None, "Account should have account number"
-            assert account.account_type in ["checking", "savings", "credit"], \
-                "Account type should be valid"
+        
+        assert {account.account_type for account in accounts} <= {"checking", "savings", "credit"}, \
+            "Account types should be valid"
     
     @pytest.mark.database
     def test_test_user_has_transactions(self, database_connection, test_user_data):
@@ -107,20 +142,19 @@ class TestUserData:
         db = database_connection
         user = test_user_data["user"]
         
-        # Get transactions through account relationships
-        transactions = db.query(Transaction).join(Account).filter(
-            Account.user_id == user.id
-        ).all()
+        # Get a sample of transactions through account relationships; 5 rows prove the lower bound
+        transactions = db.execute(_USER_TRANSACTIONS, {"user_pk": user.id, "limit": 5}).scalars().all()
         
         # User should have some transaction history for meaningful tests
-        assert len(transactions) >= 5, "Test user should have at least 5 transactions for testing"
+        assert len(transactions) == 5, "Test user should have at least 5 transactions for testing"
         
-        for transaction in transactions[:5]:  # Check first 5
+        for transaction in transactions:
             assert transaction.transaction_id is not None, "Transaction should have ID"
             assert transaction.amount is not None, "Transaction should have amount"
-            assert transaction.transaction_type in ["debit", "credit"], \
-                "Transaction type should be valid"
             assert transaction.transaction_date is not None, "Transaction should have date"
+        
+        assert {transaction.transaction_type for transaction in transactions} <= {"debit", "credit"}, \
+            "Transaction types should be valid"
     
     @pytest.mark.database
     def test_test_user_has_credit_cards(self, test_user_data):
@@ -147,17 +181,23 @@ class TestDataConsistency:
         db = database_connection
         accounts = test_user_data["accounts"]
         
+        # Sum transactions per account and type for all accounts in one grouped query
+        totals = {
+            (account_id, transaction_type): total
+            for account_id, transaction_type, total in db.execute(
+                select(Transaction.account_id, Transaction.transaction_type, func.sum(Transaction.amount))
+                .where(Transaction.account_id.in_([account.id for account in accounts]))
+                .group_by(Transaction.account_id, Transaction.transaction_type)
+            )
+        }
+        accounts_with_transactions = {account_id for account_id, _ in totals}
+        
         for account in accounts:
-            # Get all transactions for this account
-            transactions = db.query(Transaction).filter(
-                Transaction.account_id == account.id
-            ).all()
-            
             # Calculate expected balance (this is a simplified check)
-            if transactions:
+            if account.id in accounts_with_transactions:
                 # Just verify we can calculate with the transactions
-                total_credits = sum(t.amount for t in transactions if t.transaction_type == "credit")
-                total_debits = sum(t.amount for t in transactions if t.transaction_type == "debit")
+                total_credits = totals.get((account.id, "credit"), 0)
+                total_debits = totals.get((account.id, "debit"), 0)
                 
                 assert total_credits >= 0, "Total credits should be non-negative"
                 assert total_debits >= 0, "Total debits should be non-negative"
@@ -167,16 +207,14 @@ class TestDataConsistency:
                 assert isinstance(account.balance, (int, float)), "Balance should be numeric"
     
     @pytest.mark.database
-    def test_transaction_date_consistency(self, database_connection, test_user_data):
+    def test_transaction_date_consistency(self, database_connection, test_user_data, reference_now):
         """Test that transaction dates are reasonable."""
         db = database_connection
         user = test_user_data["user"]
         
-        transactions = db.query(Transaction).join(Account).filter(
-            Account.user_id == user.id
-        ).limit(10).all()
+        transactions = db.execute(_USER_TRANSACTIONS, {"user_pk": user.id, "limit": 10}).scalars().all()
         
-        current_date = datetime.now()
+        current_date = reference_now
         one_year_ago = current_date - timedelta(days=365)
         
         for transaction in transactions:
@@ -195,17 +233,20 @@ class TestDataConsistency:
         
         for card in credit_cards:
             if card.credit_limit > 0:
-                expected_utilization = (card.current_balance / card.credit_limit) * 100
-                
-                # Allow for small floating point differences
-                assert abs(expected_utilization - 
-                          (card.current_balance / card.credit_limit * 100)) < 0.01, \
-                    "Credit card utilization should be calculated correctly"
-                
-                assert 0 <= expected_utilization <= 100, \
+                assert 0 <= card.current_balance / card.credit_limit * 100 <= 100, \
                     "Utilization should be between 0 and 100 percent"
 
 
+def _time_query(run_query, iterations: int = 10):
+    """Run a query repeatedly; return the median time in seconds (filters jitter) and the last result."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        result = run_query()
+        timings.append(time.perf_counter_ns() - start)
+    return statistics.median(timings) / 1e9, result
+
+
 class TestDatabasePerformance:
     """Test database query performance."""
     
@@ -216,11 +257,9 @@ class TestDatabasePerformance:
         db = database_connection
         test_user_id = TEST_CONFIG["test_user_id"]
         
-        start_time = datetime.now()
-        user = db.query(User).filter(User.user_id == test_user_id).first()
-        end_time = datetime.now()
-        
-        query_time = (end_time - start_time).total_seconds()
+        query_time, user = _time_query(
+            lambda: db.execute(_USER_BY_USER_ID, {"user_id": test_user_id}).scalar_one_or_none()
+        )
         assert query_time < 1.0, f"User query took {query_time:.3f}s, should be < 1s"
         assert user is not None, "Should find test user"
     
@@ -231,14 +270,12 @@ class TestDatabasePerformance:
         db = database_connection
         user = test_user_data["user"]
         
-        start_time = datetime.now()
-        accounts = db.query(Account).filter(
-            Account.user_id == user.id,
-            Account.is_active == True
-        ).all()
-        end_time = datetime.now()
-        
-        query_time = (end_time - start_time).total_seconds()
+        query_time, accounts = _time_query(
+            lambda: db.query(Account).filter(
+                Account.user_id == user.id,
+                Account.is_active == True
+            ).all()
+        )
         assert query_time < 1.0, f"Account query took {query_time:.3f}s, should be < 1s"
         assert len(accounts) > 0, "Should find test user accounts"
     
@@ -249,13 +286,9 @@ class TestDatabasePerformance:
         db = database_connection
         user = test_user_data["user"]
         
-        start_time = datetime.now()
-        transactions = db.query(Transaction).join(Account).filter(
-            Account.user_id == user.id
-        ).limit(50).all()
-        end_time = datetime.now()
-        
-        query_time = (end_time - start_time).total_seconds()
+        query_time, transactions = _time_query(
+            lambda: db.execute(_USER_TRANSACTIONS, {"user_pk": user.id, "limit": 50}).scalars().all()
+        )
         assert query_time < 2.0, f"Transaction query took {query_time:.3f}s, should be < 2s"
         # Should have at least some transactions
         assert len(transactions) >= 0, "Query should complete successfully"
@@ -269,8 +302,9 @@ class TestDatabaseErrorHandling:
         """Test querying for non-existent user."""
         db = database_connection
         
-        user = db.query(User).filter(User.user_id == "nonexistent_user_12345").first()
-        assert user is None, "Should return None for non-existent user"
+        # EXISTS returns one boolean, no row to hydrate
+        assert not db.scalar(select(exists().where(User.user_id == "nonexistent_user_12345"))), \
+            "Should find no row for non-existent user"
     
     @pytest.mark.database
     def test_empty_result_handling(self, database_connection):
@@ -283,19 +317,93 @@ class TestDatabaseErrorHandling:
         assert len(accounts) == 0, "Should return empty list for impossible condition"
     
     @pytest.mark.database
-    def test_database_connection_recovery(self):
+    def test_database_connection_recovery(self, database_engine):
         """Test that new database connections can be established."""
-        # Test multiple sequential connections
+        # Test multiple sequential connection checkouts; a trivial statement proves each one works
         for i in range(3):
             try:
-                db = next(get_db())
-                user_count = db.query(User).count()
-                assert user_count >= 0, f"Connection {i} should work"
-                db.close()
-            except Exception as e:
+                with database_engine.connect() as conn:
+                    assert conn.execute(text("SELECT 1")).scalar() == 1, f"Connection {i} should work"
+            except SQLAlchemyError as e:
                 pytest.fail(f"Database connection {i} failed: {e}")
 
 
+class TestFeedbackStorage:
+    """Test the feedback index migration and the feedback upsert on a scratch database."""
+    
+    @pytest.fixture
+    def scratch_engine(self):
+        """Empty in-memory database with the current schema"""
+        scratch = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(scratch)
+        yield scratch
+        scratch.dispose()
+    
+    @pytest.fixture
+    def legacy_feedback(self, scratch_engine):
+        """Scratch database with the old plain feedback index and two feedback rows for chat 7"""
+        with scratch_engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_feedback_chat_history_id"))
+            connection.execute(text("CREATE INDEX ix_feedback_chat_history_id ON feedback (chat_history_id)"))
+            connection.execute(insert(Feedback), [
+                {"user_id": 1, "chat_history_id": 7, "rating": 1},
+                {"user_id": 1, "chat_history_id": 7, "rating": 2},
+                {"user_id": 1, "chat_history_id": 8, "rating": 1}
+            ])
+        return scratch_engine
+    
+    @staticmethod
+    def _feedback_rows(bind) -> List[tuple]:
+        with bind.connect() as connection:
+            rows = connection.execute(select(Feedback.id, Feedback.chat_history_id, Feedback.rating).order_by(Feedback.id)).all()
+        return [tuple(row) for row in rows]
+    
+    @pytest.mark.database
+    def test_unique_index_refuses_duplicates(self, legacy_feedback):
+        """Test that the startup index check fails on duplicate feedback instead of deleting any."""
+        with pytest.raises(RuntimeError, match="dedupe_feedback.py"):
+            ensure_feedback_unique_index(legacy_feedback)
+        
+        assert len(self._feedback_rows(legacy_feedback)) == 3
+        indexes = {ix["name"]: ix for ix in inspect(legacy_feedback).get_indexes("feedback")}
+        assert not indexes["ix_feedback_chat_history_id"]["unique"]
+    
+    @pytest.mark.database
+    def test_dedupe_then_unique_index(self, legacy_feedback):
+        """Test that deduplicating keeps the newest row per chat and lets the index become unique."""
+        assert dedupe_feedback(legacy_feedback) == 1
+        ensure_feedback_unique_index(legacy_feedback)
+        ensure_feedback_unique_index(legacy_feedback)  # no-op once the index is unique
+        
+        indexes = {ix["name"]: ix for ix in inspect(legacy_feedback).get_indexes("feedback")}
+        assert indexes["ix_feedback_chat_history_id"]["unique"]
+        assert self._feedback_rows(legacy_feedback) == [(2, 7, 2), (3, 8, 1)]
+    
+    @pytest.mark.database
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("upsert_supported", [True, False], ids=["on_conflict", "select_then_write"])
+    async def test_feedback_resubmission_updates_row(self, scratch_engine, monkeypatch, upsert_supported):
+        """Test that submitting feedback twice for a chat leaves one updated row, with or without ON CONFLICT."""
+        if not upsert_supported:
+            monkeypatch.delitem(feedback_service_module._DIALECT_INSERTS, "sqlite")
+        user = User(id=1, user_id="feedback_user")
+        with Session(scratch_engine) as db:
+            db.execute(insert(ChatHistory).values(
+                id=1, user_id=1, chat_thread_id="thread", user_query="hi", bot_response="hello"
+            ))
+            db.commit()
+            
+            first = await feedback_service.submit_feedback(FeedbackCreate(chat_history_id=1, rating=1), user, db)
+            second = await feedback_service.submit_feedback(
+                FeedbackCreate(chat_history_id=1, rating=2, comments="Helpful"), user, db
+            )
+            
+            assert first is not None and second is not None
+            assert second.id == first.id
+            assert (second.rating, second.comments) == (2, "Helpful")
+            assert db.scalar(select(func.count()).select_from(Feedback)) == 1
+
+
 if __name__ == "__main__":
     # Run database tests
     pytest.main([__file__, "-v", "--tb=short", "-m", "database"])
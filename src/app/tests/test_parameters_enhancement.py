@@ -7,13 +7,14 @@ and error handling for all banking tools.
 
 import pytest
 import re
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 
 from .conftest import validate_json_response, TestCategories
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ParameterValidation:
     """Parameter validation result."""
     is_valid: bool
@@ -98,159 +99,291 @@ class ParameterValidator:
         }
     }
     
+    def __init__(self):
+        # One cache per instance, so a subclass with other VALIDATION_RULES never sees these results
+        self._validate_cached = lru_cache(maxsize=1024)(self._validate_key)
+    
     def validate_parameter(self, param_name: str, value: Any, validation_rules: Dict[str, Any]) -> ParameterValidation:
         """Validate a single parameter against its rules."""
+        checks = validation_rules.get("_compiled")
+        if checks is None:  # rules not taken from VALIDATION_RULES
+            checks = _compile_rule(validation_rules)
+        
+        for check in checks:
+            result = check(param_name, value)
+            if result is not None:
+                return result
+        
+        return ParameterValidation(True, param_name, value)
+    
+    def validate_tool_parameters(self, tool_name: str, parameters: Dict[str, Any]) -> List[ParameterValidation]:
+        """Validate all parameters for a tool; results are memoized per tool and parameter set."""
+        try:
+            # The value's type is part of the key: 1, 1.0 and True hash alike but validate differently
+            key = tuple((name, type(value), value) for name, value in parameters.items())
+            hash(key)
+        except TypeError:  # unhashable value, validate without the cache
+            return self._validate_tool_parameters(tool_name, parameters)
+        return list(self._validate_cached(tool_name, key))
+    
+    def _validate_key(self, tool_name: str, key: tuple) -> tuple:
+        # Results, successes included, are built once per distinct call and shared afterwards;
+        # they keep their parameter name and value since callers look results up by name
+        parameters = {name: value for name, _, value in key}
+        return tuple(self._validate_tool_parameters(tool_name, parameters))
+    
+    def _validate_tool_parameters(self, tool_name: str, parameters: Dict[str, Any]) -> List[ParameterValidation]:
+        if tool_name not in self.VALIDATION_RULES:
+            return [ParameterValidation(False, "tool_name", tool_name, f"Unknown tool: {tool_name}")]
+        
+        tool_rules = self.VALIDATION_RULES[tool_name]
+        required_set = tool_rules.get("required_set")
+        if required_set is None:  # rules not taken from VALIDATION_RULES
+            required_set = frozenset(tool_rules["required"])
+        rules_map = tool_rules["rules"]
+        validations = []
+        append = validations.append
+        
+        # Check every given parameter we have rules for, required or optional, in one pass
+        for param_name, param_value in parameters.items():
+            param_rules = rules_map.get(param_name)
+            if param_rules:
+                append(self.validate_parameter(param_name, param_value, param_rules))
         
-        # Type validation
-        expected_type = validation_rules.get("type")
-        if expected_type:
-            if isinstance(expected_type, list):
-                if not any(isinstance(value, t) for t in expected_type):
-                    return ParameterValidation(
-                        False, param_name, value,
-                        f"Expected type {expected_type}, got {type(value).__name__}",
-                        f"Provide value of type {expected_type}"
-                    )
-            else:
-                if not isinstance(value, expected_type):
-                    return ParameterValidation(
-                        False, param_name, value,
-                        f"Expected type {expected_type.__name__}, got {type(value).__name__}",
-                        f"Provide value of type {expected_type.__name__}"
-                    )
+        # Report missing required parameters (in declaration order)
+        if not required_set <= parameters.keys():
+            for required_param in tool_rules["required"]:
+                if required_param not in parameters:
+                    append(ParameterValidation(
+                        False, required_param, None,
+                        f"Required parameter '{required_param}' missing",
+                        f"Provide required parameter '{required_param}'"
+                    ))
+        
+        return validations
+
+
+def _is_yyyy_mm_dd(value: str) -> bool:
+    r"""Same strings as ASCII ^\d{4}-\d{2}-\d{2}$ without a trailing newline, using plain string checks."""
+    return (len(value) == 10 and value.isascii() and value[4] == "-" and value[7] == "-"
+            and value[:4].isdecimal() and value[5:7].isdecimal() and value[8:].isdecimal())
+
+
+def _is_account_number(value: str) -> bool:
+    """Same strings as ASCII ^[A-Z0-9]{1,20}$ without a trailing newline, using plain string checks."""
+    return (0 < len(value) <= 20 and value.isascii() and value.isalnum()
+            and (value.isupper() or value.isdigit()))
+
+
+# Hand-written matchers for the fixed patterns in VALIDATION_RULES; others use the compiled regex
+_PATTERN_MATCHERS = {
+    r"^\d{4}-\d{2}-\d{2}$": _is_yyyy_mm_dd,
+    r"^[A-Z0-9]{1,20}$": _is_account_number,
+}
+
+Check = Callable[[str, Any], Optional[ParameterValidation]]
+
+
+def _only_for(kind: type, check: Check, admitted: Optional[set]) -> Check:
+    """Run check only on values of kind; the guard is dropped when the type check admits nothing else."""
+    if admitted == {kind}:
+        return check
+    return lambda param_name, value: check(param_name, value) if isinstance(value, kind) else None
+
+
+def _compile_rule(rules: Dict[str, Any], rule_name: Optional[str] = None) -> Tuple[Check, ...]:
+    """Turn a parameter's rule dict into the checks validate_parameter runs in order.
+    
+    Each check returns None to continue, or the ParameterValidation to report: a failure, or
+    an early success for an allowed None. Constants are bound into the closures here, so
+    validating reads no rule keys; message parts that only depend on the rule (suggestions,
+    type and pattern text) are formatted here too. With rule_name, fixed failure results for
+    that parameter are built up front.
+    """
+    checks: List[Check] = []
+    admitted = None  # types a value can still have after the type check, None = any
+    
+    # Type validation
+    expected_type = rules.get("type")
+    if isinstance(expected_type, list):
+        type_tuple = tuple(expected_type)
+        type_text = str(expected_type)
+        type_suggestion = f"Provide value of type {type_text}"
+        
+        def check_type(param_name, value):
+            if not isinstance(value, type_tuple):
+                return ParameterValidation(
+                    False, param_name, value,
+                    f"Expected type {type_text}, got {type(value).__name__}",
+                    type_suggestion
+                )
+        checks.append(check_type)
+        admitted = set(type_tuple)
         
         # Skip further validation if value is None and that's allowed
-        if value is None and (isinstance(expected_type, list) and type(None) in expected_type):
-            return ParameterValidation(True, param_name, value)
-        
-        # String-specific validations
-        if isinstance(value, str):
-            # Min length validation
-            min_length = validation_rules.get("min_length")
-            if min_length and len(value) < min_length:
+        if type(None) in admitted:
+            checks.append(lambda param_name, value: ParameterValidation(True, param_name, value) if value is None else None)
+            admitted.discard(type(None))
+    elif expected_type:
+        type_text = expected_type.__name__
+        type_suggestion = f"Provide value of type {type_text}"
+        
+        def check_type(param_name, value):
+            if not isinstance(value, expected_type):
                 return ParameterValidation(
                     False, param_name, value,
-                    f"Minimum length {min_length}, got {len(value)}",
-                    f"Provide string with at least {min_length} characters"
+                    f"Expected type {type_text}, got {type(value).__name__}",
+                    type_suggestion
                 )
-            
-            # Invalid values validation
-            invalid_values = validation_rules.get("invalid_values", [])
-            if value.lower() in [iv.lower() for iv in invalid_values]:
+        checks.append(check_type)
+        admitted = {expected_type}
+    
+    # String-specific validations
+    min_length = rules.get("min_length")
+    if min_length:
+        length_suggestion = f"Provide string with at least {min_length} characters"
+        
+        def check_min_length(param_name, value):
+            if len(value) < min_length:
                 return ParameterValidation(
                     False, param_name, value,
-                    f"Value '{value}' is a placeholder or invalid",
-                    "Provide the actual authenticated user ID, not a placeholder"
+                    f"Minimum length {min_length}, got {len(value)}",
+                    length_suggestion
                 )
-            
-            # Pattern validation
-            pattern = validation_rules.get("pattern")
-            if pattern and not re.match(pattern, value):
+        checks.append(_only_for(str, check_min_length, admitted))
+    
+    invalid_values = frozenset(v.lower() for v in rules.get("invalid_values", ()))
+    if invalid_values:
+        def placeholder_result(param_name, value):
+            return ParameterValidation(
+                False, param_name, value,
+                f"Value '{value}' is a placeholder or invalid",
+                "Provide the actual authenticated user ID, not a placeholder"
+            )
+        
+        # Results for the canonical placeholders are built once; results are frozen so they can be shared
+        prebuilt = {v: placeholder_result(rule_name, v) for v in invalid_values} if rule_name else {}
+        
+        def check_invalid_values(param_name, value):
+            # The set is lowercase; only values with uppercase letters need lowercasing first
+            if value in invalid_values:
+                result = prebuilt.get(value)
+                if result is not None and param_name == rule_name:
+                    return result
+                return placeholder_result(param_name, value)
+            if not value.islower() and value.lower() in invalid_values:
+                return placeholder_result(param_name, value)
+        checks.append(_only_for(str, check_invalid_values, admitted))
+    
+    pattern = rules.get("pattern")
+    if pattern:
+        pattern = re.compile(pattern, re.ASCII)  # \d is [0-9]; the rule patterns are ASCII-only
+        matcher = _PATTERN_MATCHERS.get(pattern.pattern) or pattern.match
+        pattern_text = pattern.pattern
+        pattern_suggestion = f"Provide value matching pattern {pattern_text}"
+        
+        def check_pattern(param_name, value):
+            if not matcher(value):
                 return ParameterValidation(
                     False, param_name, value,
-                    f"Value '{value}' doesn't match required pattern {pattern}",
-                    f"Provide value matching pattern {pattern}"
+                    f"Value '{value}' doesn't match required pattern {pattern_text}",
+                    pattern_suggestion
                 )
-            
-            # Allowed values validation
-            allowed_values = validation_rules.get("allowed_values")
-            if allowed_values and value not in allowed_values:
+        checks.append(_only_for(str, check_pattern, admitted))
+    
+    allowed_values = rules.get("allowed_values")
+    if allowed_values:
+        allowed_text = str(allowed_values)
+        allowed_suggestion = f"Use one of: {allowed_text}"
+        
+        def check_allowed_values(param_name, value):
+            if value not in allowed_values:
                 return ParameterValidation(
                     False, param_name, value,
-                    f"Value '{value}' not in allowed values {allowed_values}",
-                    f"Use one of: {allowed_values}"
+                    f"Value '{value}' not in allowed values {allowed_text}",
+                    allowed_suggestion
                 )
+        checks.append(_only_for(str, check_allowed_values, admitted))
+    
+    # Integer-specific validations
+    min_value = rules.get("min_value")
+    if min_value is not None:
+        min_suggestion = f"Provide value >= {min_value}"
         
-        # Integer-specific validations
-        if isinstance(value, int):
-            min_value = validation_rules.get("min_value")
-            max_value = validation_rules.get("max_value")
-            
-            if min_value and value < min_value:
+        def check_min_value(param_name, value):
+            if value < min_value:
                 return ParameterValidation(
                     False, param_name, value,
                     f"Value {value} below minimum {min_value}",
-                    f"Provide value >= {min_value}"
+                    min_suggestion
                 )
-            
-            if max_value and value > max_value:
+        checks.append(_only_for(int, check_min_value, admitted))
+    
+    max_value = rules.get("max_value")
+    if max_value is not None:
+        max_suggestion = f"Provide value <= {max_value}"
+        
+        def check_max_value(param_name, value):
+            if value > max_value:
                 return ParameterValidation(
                     False, param_name, value,
                     f"Value {value} above maximum {max_value}",
-                    f"Provide value <= {max_value}"
+                    max_suggestion
                 )
-        
-        return ParameterValidation(True, param_name, value)
+        checks.append(_only_for(int, check_max_value, admitted))
     
-    def validate_tool_parameters(self, tool_name: str, parameters: Dict[str, Any]) -> List[ParameterValidation]:
-        """Validate all parameters for a tool."""
-        if tool_name not in self.VALIDATION_RULES:
-            return [ParameterValidation(False, "tool_name", tool_name, f"Unknown tool: {tool_name}")]
-        
-        tool_rules = self.VALIDATION_RULES[tool_name]
-        validations = []
-        
-        # Check required parameters
-        for required_param in tool_rules["required"]:
-            if required_param not in parameters:
-                validations.append(ParameterValidation(
-                    False, required_param, None,
-                    f"Required parameter '{required_param}' missing",
-                    f"Provide required parameter '{required_param}'"
-                ))
-            else:
-                param_value = parameters[required_param]
-                param_rules = tool_rules["rules"].get(required_param, {})
-                validation = self.validate_parameter(required_param, param_value, param_rules)
-                validations.append(validation)
-        
-        # Check optional parameters
-        for param_name, param_value in parameters.items():
-            if param_name not in tool_rules["required"]:
-                param_rules = tool_rules["rules"].get(param_name, {})
-                if param_rules:  # Only validate if we have rules for it
-                    validation = self.validate_parameter(param_name, param_value, param_rules)
-                    validations.append(validation)
-        
-        return validations
+    return tuple(checks)
+
+
+# Precompute required-parameter sets and compile every parameter's rules into checks at import
+for _tool_rules in ParameterValidator.VALIDATION_RULES.values():
+    _tool_rules["required_set"] = frozenset(_tool_rules["required"])
+    for _param_name, _param_rules in _tool_rules["rules"].items():
+        _param_rules["_compiled"] = _compile_rule(_param_rules, _param_name)
+
+# The validator keeps no per-instance state, so one instance serves every test
+_VALIDATOR = ParameterValidator()
 
 
 class TestParameterValidation:
     """Test suite for parameter validation."""
     
-    def setup_method(self):
-        """Setup parameter validator for each test."""
-        self.validator = ParameterValidator()
+    validator = _VALIDATOR
     
     @pytest.mark.validation
-    @pytest.mark.parametrize("tool_name,parameters,expected_valid", [
-        # Valid parameter sets
-        ("get_account_balance", {"user_id": "jane_smith"}, True),
-        ("get_account_balance", {"user_id": "jane_smith", "account_number": "ACC001"}, True),
-        ("get_transactions", {"user_id": "jane_smith"}, True),
-        ("get_transactions", {"user_id": "jane_smith", "limit": 5, "start_date": "2024-01-01"}, True),
-        ("get_credit_card_info", {"user_id": "jane_smith"}, True),
-        
-        # Invalid parameter sets
-        ("get_account_balance", {"user_id": ""}, False),  # Empty user_id
-        ("get_account_balance", {"user_id": "user_id"}, False),  # Placeholder user_id
-        ("get_account_balance", {}, False),  # Missing user_id
-        ("get_transactions", {"user_id": "jane_smith", "limit": 150}, False),  # Limit too high
-        ("get_transactions", {"user_id": "jane_smith", "start_date": "2024/01/01"}, False),  # Wrong date format
-        ("get_transactions", {"user_id": "your_user_id"}, False),  # Placeholder user_id
-        ("get_credit_card_info", {"user_id": "placeholder"}, False),  # Placeholder user_id
-    ])
-    def test_parameter_validation(self, tool_name, parameters, expected_valid):
+    def test_parameter_validation(self):
         """Test parameter validation for various input combinations."""
-        validations = self.validator.validate_tool_parameters(tool_name, parameters)
+        # One test over all cases instead of a parametrized test per case
+        cases = [
+            # Valid parameter sets
+            ("get_account_balance", {"user_id": "jane_smith"}, True),
+            ("get_account_balance", {"user_id": "jane_smith", "account_number": "ACC001"}, True),
+            ("get_transactions", {"user_id": "jane_smith"}, True),
+            ("get_transactions", {"user_id": "jane_smith", "limit": 5, "start_date": "2024-01-01"}, True),
+            ("get_credit_card_info", {"user_id": "jane_smith"}, True),
+            
+            # Invalid parameter sets
+            ("get_account_balance", {"user_id": ""}, False),  # Empty user_id
+            ("get_account_balance", {"user_id": "user_id"}, False),  # Placeholder user_id
+            ("get_account_balance", {}, False),  # Missing user_id
+            ("get_transactions", {"user_id": "jane_smith", "limit": 150}, False),  # Limit too high
+            ("get_transactions", {"user_id": "jane_smith", "start_date": "2024/01/01"}, False),  # Wrong date format
+            ("get_transactions", {"user_id": "your_user_id"}, False),  # Placeholder user_id
+            ("get_credit_card_info", {"user_id": "placeholder"}, False),  # Placeholder user_id
+        ]
         
-        # Check if any validation failed
-        has_errors = any(not v.is_valid for v in validations)
+        # Collect every mismatch so one run reports all failing cases
+        mismatches = []
+        for tool_name, parameters, expected_valid in cases:
+            validations = self.validator.validate_tool_parameters(tool_name, parameters)
+            errors = [v.error_message for v in validations if not v.is_valid]
+            
+            if expected_valid and errors:
+                mismatches.append(f"{tool_name} {parameters}: expected valid parameters but got errors: {errors}")
+            elif not expected_valid and not errors:
+                mismatches.append(f"{tool_name} {parameters}: expected invalid parameters but validation passed")
         
-        if expected_valid:
-            assert not has_errors, f"Expected valid parameters but got errors: {[v.error_message for v in validations if not v.is_valid]}"
-        else:
-            assert has_errors, f"Expected invalid parameters but validation passed"
+        assert not mismatches, "\n".join(mismatches)
     
     @pytest.mark.validation
     def test_placeholder_user_id_detection(self):
@@ -346,14 +479,38 @@ class TestParameterValidation:
             type_validation = next((v for v in validations if v.parameter_name == "transaction_type"), None)
             if type_validation:  # Only check if validation was performed
                 assert not type_validation.is_valid, f"Invalid transaction type '{tx_type}' should fail validation"
+    
+    @pytest.mark.validation
+    def test_zero_bounds_enforced(self):
+        """Test that a bound of 0 is enforced rather than treated as unset."""
+        rules = {"type": int, "min_value": 0, "max_value": 0, "description": "Zero-only value"}
+        
+        assert self.validator.validate_parameter("offset", 0, rules).is_valid, "0 is within [0, 0]"
+        assert "minimum" in self.validator.validate_parameter("offset", -1, rules).error_message.lower()
+        assert "maximum" in self.validator.validate_parameter("offset", 1, rules).error_message.lower()
+    
+    @pytest.mark.validation
+    def test_validation_cache_is_per_instance(self):
+        """Test that a validator with other rules does not get cached results from another instance."""
+        class StrictLimitValidator(ParameterValidator):
+            VALIDATION_RULES = {
+                "get_transactions": {
+                    "required": ["user_id"],
+                    "rules": {"limit": {"type": int, "max_value": 5, "description": "At most 5 transactions"}}
+                }
+            }
+        
+        params = {"user_id": "jane_smith", "limit": 10}
+        assert all(v.is_valid for v in self.validator.validate_tool_parameters("get_transactions", params))
+        
+        strict = StrictLimitValidator().validate_tool_parameters("get_transactions", params)
+        assert [v.parameter_name for v in strict if not v.is_valid] == ["limit"]
 
 
 class TestParameterEnhancement:
     """Test suite for parameter enhancement features."""
     
-    def setup_method(self):
-        """Setup parameter validator for each test."""
-        self.validator = ParameterValidator()
+    validator = _VALIDATOR
     
     @pytest.mark.validation
     def test_error_message_quality(self):
@@ -369,11 +526,12 @@ class TestParameterEnhancement:
         
         for params, expected_error_keyword, description in test_cases:
             validations = self.validator.validate_tool_parameters("get_transactions", params)
-            error_validations = [v for v in validations if not v.is_valid]
-            
-            assert len(error_validations) > 0, f"Should have validation errors for {description}"
             
-            for error_validation in error_validations:
+            error_count = 0
+            for error_validation in validations:
+                if error_validation.is_valid:
+                    continue
+                error_count += 1
                 assert error_validation.error_message, f"Should have error message for {description}"
                 assert expected_error_keyword.lower() in error_validation.error_message.lower(), \
                     f"Error message should contain '{expected_error_keyword}' for {description}"
@@ -381,6 +539,8 @@ class TestParameterEnhancement:
                 if error_validation.suggestion:
                     assert len(error_validation.suggestion) > 10, \
                         f"Suggestion should be meaningful for {description}"
+            
+            assert error_count > 0, f"Should have validation errors for {description}"
     
     @pytest.mark.validation
     def test_validation_completeness(self):
@@ -412,10 +572,9 @@ class TestParameterEnhancement:
         
         for params, expected_suggestion_keyword in error_cases:
             validations = self.validator.validate_tool_parameters("get_transactions", params)
-            error_validations = [v for v in validations if not v.is_valid]
             
-            for error_validation in error_validations:
-                if error_validation.suggestion:
+            for error_validation in validations:
+                if not error_validation.is_valid and error_validation.suggestion:
                     assert expected_suggestion_keyword.lower() in error_validation.suggestion.lower(), \
                         f"Suggestion should contain '{expected_suggestion_keyword}' for parameters {params}"
 
@@ -7,13 +7,18 @@ to ensure they conform to expected data structures and formats.
 
 import pytest
 import json
+import re
 from typing import Dict, Any, List
-import jsonschema
+import fastjsonschema
 from datetime import datetime
 
 from .conftest import validate_json_response, TestCategories
 
 
+# Formats shared by the schemas and the format tests
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_ACCT_RE = re.compile(r"^[A-Z0-9]{1,20}$")
+
 # Tool Schema Definitions
 ACCOUNT_BALANCE_INPUT_SCHEMA = {
     "type": "object",
@@ -75,8 +80,8 @@ TRANSACTIONS_INPUT_SCHEMA = {
         "user_id": {"type": "string", "minLength": 1},
         "account_number": {"type": ["string", "null"]},
         "limit": {"type": "integer", "minimum": 1, "maximum": 100},
-        "start_date": {"type": ["string", "null"], "pattern": "^\\d{4}-\\d{2}-\\d{2}$"},
-        "end_date": {"type": ["string", "null"], "pattern": "^\\d{4}-\\d{2}-\\d{2}$"},
+        "start_date": {"type": ["string", "null"], "pattern": _DATE_RE.pattern},
+        "end_date": {"type": ["string", "null"], "pattern": _DATE_RE.pattern},
         "transaction_type": {"enum": ["debit", "credit", None]}
     },
     "required": ["user_id"],
@@ -182,6 +187,11 @@ TOOL_SCHEMAS = {
     }
 }
 
+# Compile each schema to a validation function once (fastjsonschema generates Python code for it)
+for _schemas in TOOL_SCHEMAS.values():
+    for _kind in ("input", "output"):
+        _schemas[f"{_kind}_validator"] = fastjsonschema.compile(_schemas[_kind])
+
 
 class TestSchemaValidation:
     """Test suite for schema validation of all tools."""
@@ -192,9 +202,9 @@ class TestSchemaValidation:
             return False, f"Unknown tool: {tool_name}"
         
         try:
-            jsonschema.validate(input_data, TOOL_SCHEMAS[tool_name]["input"])
+            TOOL_SCHEMAS[tool_name]["input_validator"](input_data)
             return True, "Input schema validation passed"
-        except jsonschema.ValidationError as e:
+        except fastjsonschema.JsonSchemaValueException as e:
             return False, f"Input schema validation failed: {e.message}"
     
     def validate_output_schema(self, tool_name: str, output_data: Dict[str, Any]) -> tuple[bool, str]:
@@ -203,9 +213,9 @@ class TestSchemaValidation:
             return False, f"Unknown tool: {tool_name}"
         
         try:
-            jsonschema.validate(output_data, TOOL_SCHEMAS[tool_name]["output"])
+            TOOL_SCHEMAS[tool_name]["output_validator"](output_data)
             return True, "Output schema validation passed"
-        except jsonschema.ValidationError as e:
+        except fastjsonschema.JsonSchemaValueException as e:
             return False, f"Output schema validation failed: {e.message}"
     
     @pytest.mark.validation
@@ -235,28 +245,10 @@ class TestSchemaValidation:
     
     @pytest.mark.validation
     @pytest.mark.integration
-    def test_actual_tool_output_schemas(self, test_user_data):
+    def test_actual_tool_output_schemas(self, tool_outputs):
         """Test that actual tool outputs conform to schemas."""
-        from ..tools.sql_retrieval_tool import (
-            get_account_balance,
-            get_transactions,
-            get_credit_card_info
-        )
-        
-        user_id = test_user_data["user"].user_id
-        
-        # Test each tool's actual output
-        tools_to_test = [
-            ("get_account_balance", get_account_balance, {"user_id": user_id}),
-            ("get_transactions", get_transactions, {"user_id": user_id, "limit": 5}),
-            ("get_credit_card_info", get_credit_card_info, {"user_id": user_id})
-        ]
-        
-        for tool_name, tool_func, params in tools_to_test:
-            # Get actual tool output
-            result_str = tool_func.invoke(params)
-            result = validate_json_response(result_str)
-            
+        # Each tool's actual output for the test user
+        for tool_name, result in tool_outputs.items():
             # Validate against schema
             is_valid, message = self.validate_output_schema(tool_name, result)
             assert is_valid, f"{tool_name} output schema validation failed: {message}"
@@ -300,14 +292,11 @@ class TestDataFormatValidation:
         valid_dates = ["2024-01-01", "2024-12-31", "2023-06-15"]
         invalid_dates = ["2024/01/01", "01-01-2024", "Jan 1, 2024", "2024-1-1"]
         
-        date_pattern = r"^\d{4}-\d{2}-\d{2}$"
-        import re
-        
         for date in valid_dates:
-            assert re.match(date_pattern, date), f"Valid date {date} should match pattern"
+            assert _DATE_RE.match(date), f"Valid date {date} should match pattern"
         
         for date in invalid_dates:
-            assert not re.match(date_pattern, date), f"Invalid date {date} should not match pattern"
+            assert not _DATE_RE.match(date), f"Invalid date {date} should not match pattern"
     
     @pytest.mark.validation
     def test_account_number_format_validation(self):
@@ -315,14 +304,11 @@ class TestDataFormatValidation:
         valid_account_numbers = ["ACC001", "1001234569", "CHECKING123", "A1B2C3"]
         invalid_account_numbers = ["acc-001", "account_number", "", "a" * 25]  # Too long
         
-        account_pattern = r"^[A-Z0-9]{1,20}$"
-        import re
-        
         for acc_num in valid_account_numbers:
-            assert re.match(account_pattern, acc_num), f"Valid account {acc_num} should match pattern"
+            assert _ACCT_RE.match(acc_num), f"Valid account {acc_num} should match pattern"
         
         for acc_num in invalid_account_numbers:
-            assert not re.match(account_pattern, acc_num), f"Invalid account {acc_num} should not match pattern"
+            assert not _ACCT_RE.match(acc_num), f"Invalid account {acc_num} should not match pattern"
     
     @pytest.mark.validation
     def test_transaction_type_validation(self):
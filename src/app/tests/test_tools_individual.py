@@ -29,12 +29,9 @@ class TestAccountBalanceTool:
     """Test suite for get_account_balance tool."""
     
     @pytest.mark.unit
-    def test_valid_user_balance(self, test_user_data):
+    def test_valid_user_balance(self, tool_outputs):
         """Test getting balance for valid user."""
-        user_id = test_user_data["user"].user_id
-        
-        result_str = get_account_balance.invoke({"user_id": user_id})
-        result = validate_json_response(result_str)
+        result = tool_outputs["get_account_balance"]
         
         assert_tool_success(result, EXPECTED_TOOL_RESPONSES["get_account_balance"])
         assert len(result["accounts"]) > 0, "Should return at least one account"
@@ -58,25 +55,6 @@ class TestAccountBalanceTool:
             # Should return specific account or empty if not found
             assert isinstance(result["accounts"], list)
     
-    @pytest.mark.validation
-    @pytest.mark.parametrize("invalid_params", get_invalid_test_parameters())
-    def test_invalid_user_id_rejection(self, invalid_params):
-        """Test that invalid user_ids are properly rejected."""
-        from pydantic_core import ValidationError
-        
-        # Some invalid parameters (like None) are caught by Pydantic validation
-        # before reaching our tool logic
-        if invalid_params.get("user_id") is None:
-            with pytest.raises(ValidationError):
-                get_account_balance.invoke(invalid_params)
-        else:
-            result_str = get_account_balance.invoke(invalid_params)
-            result = validate_json_response(result_str)
-            
-            assert_tool_error(result, "invalid user_id")
-            assert "message" in result, "Should provide helpful error message"
-            assert "suggestion" in result, "Should provide suggestion for fix"
-    
     @pytest.mark.unit
     def test_nonexistent_user(self):
         """Test behavior with non-existent user."""
@@ -110,15 +88,9 @@ class TestTransactionsTool:
         assert result["limit"] == 10, "Default limit should be 10"
     
     @pytest.mark.unit
-    def test_transactions_with_limit(self, test_user_data):
+    def test_transactions_with_limit(self, tool_outputs):
         """Test transaction retrieval with custom limit."""
-        user_id = test_user_data["user"].user_id
-        
-        result_str = get_transactions.invoke({
-            "user_id": user_id, 
-            "limit": 5
-        })
-        result = validate_json_response(result_str)
+        result = tool_outputs["get_transactions"]  # invoked with limit=5
         
         assert_tool_success(result, EXPECTED_TOOL_RESPONSES["get_transactions"])
         assert result["limit"] == 5, "Should respect custom limit"
@@ -171,35 +143,15 @@ class TestTransactionsTool:
         
         # Should either be clamped or rejected
         assert isinstance(result, dict)
-    
-    @pytest.mark.validation
-    @pytest.mark.parametrize("invalid_params", get_invalid_test_parameters()) 
-    def test_invalid_user_id_rejection(self, invalid_params):
-        """Test that invalid user_ids are properly rejected."""
-        from pydantic_core import ValidationError
-        
-        # Some invalid parameters (like None) are caught by Pydantic validation
-        # before reaching our tool logic
-        if invalid_params.get("user_id") is None:
-            with pytest.raises(ValidationError):
-                get_transactions.invoke(invalid_params)
-        else:
-            result_str = get_transactions.invoke(invalid_params)
-            result = validate_json_response(result_str)
-            
-            assert_tool_error(result, "invalid user_id")
 
 
 class TestCreditCardTool:
     """Test suite for get_credit_card_info tool."""
     
     @pytest.mark.unit
-    def test_valid_user_credit_cards(self, test_user_data):
+    def test_valid_user_credit_cards(self, tool_outputs):
         """Test getting credit card info for valid user."""
-        user_id = test_user_data["user"].user_id
-        
-        result_str = get_credit_card_info.invoke({"user_id": user_id})
-        result = validate_json_response(result_str)
+        result = tool_outputs["get_credit_card_info"]
         
         assert_tool_success(result, EXPECTED_TOOL_RESPONSES["get_credit_card_info"])
         assert isinstance(result["credit_cards"], list)
@@ -220,23 +172,6 @@ class TestCreditCardTool:
                 # Utilization rate should be reasonable
                 assert 0 <= card["utilization_rate"] <= 100, "Utilization rate should be 0-100%"
     
-    @pytest.mark.validation
-    @pytest.mark.parametrize("invalid_params", get_invalid_test_parameters())
-    def test_invalid_user_id_rejection(self, invalid_params):
-        """Test that invalid user_ids are properly rejected."""
-        from pydantic_core import ValidationError
-        
-        # Some invalid parameters (like None) are caught by Pydantic validation
-        # before reaching our tool logic
-        if invalid_params.get("user_id") is None:
-            with pytest.raises(ValidationError):
-                get_credit_card_info.invoke(invalid_params)
-        else:
-            result_str = get_credit_card_info.invoke(invalid_params)
-            result = validate_json_response(result_str)
-            
-            assert_tool_error(result, "invalid user_id")
-    
     @pytest.mark.unit
     def test_nonexistent_user(self):
         """Test behavior with non-existent user."""
@@ -246,24 +181,37 @@ class TestCreditCardTool:
         assert_tool_error(result, "user not found")
 
 
+@pytest.mark.validation
+@pytest.mark.parametrize("tool_func", [get_account_balance, get_transactions, get_credit_card_info],
+                         ids=lambda tool: tool.name)
+@pytest.mark.parametrize("invalid_params", get_invalid_test_parameters())
+def test_invalid_user_id_rejection(tool_func, invalid_params):
+    """Test that every tool properly rejects invalid user_ids."""
+    from pydantic_core import ValidationError
+    
+    # Some invalid parameters (like None) are caught by Pydantic validation
+    # before reaching our tool logic
+    if invalid_params.get("user_id") is None:
+        with pytest.raises(ValidationError):
+            tool_func.invoke(invalid_params)
+    else:
+        result_str = tool_func.invoke(invalid_params)
+        result = validate_json_response(result_str)
+        
+        assert_tool_error(result, "invalid user_id")
+        assert "message" in result, "Should provide helpful error message"
+        assert "suggestion" in result, "Should provide suggestion for fix"
+
+
 class TestToolsIntegration:
     """Integration tests for all tools working together."""
     
     @pytest.mark.integration
-    def test_all_tools_for_user(self, test_user_data):
+    def test_all_tools_for_user(self, tool_outputs):
         """Test that all tools work for the same user."""
-        user_id = test_user_data["user"].user_id
-        
-        # Test all tools
-        balance_result = validate_json_response(
-            get_account_balance.invoke({"user_id": user_id})
-        )
-        txn_result = validate_json_response(
-            get_transactions.invoke({"user_id": user_id, "limit": 5})
-        )
-        card_result = validate_json_response(
-            get_credit_card_info.invoke({"user_id": user_id})
-        )
+        balance_result = tool_outputs["get_account_balance"]
+        txn_result = tool_outputs["get_transactions"]
+        card_result = tool_outputs["get_credit_card_info"]
         
         # All should succeed for valid user
         assert_tool_success(balance_result, EXPECTED_TOOL_RESPONSES["get_account_balance"])
@@ -1,11 +1,11 @@
 from langchain.tools import tool
 from typing import Optional
 import json
-import chromadb
 import os
-from pathlib import Path
 from langchain_openai import OpenAIEmbeddings
 
+from ..database.chromadb_client import CHROMADB_PATH, get_chroma_client
+
 import logging
 
 # Setup logging for document tool
@@ -34,14 +34,13 @@ def search_bank_documents(query: str) -> str:
         # Import settings to get the correct collection name
         from src.app.config.service_config import settings
         
-        PROJECT_ROOT = Path(__file__).parents[3]
-        chromadb_path = PROJECT_ROOT / "data" / "chromadb"
+        chromadb_path = CHROMADB_PATH
         
         logger.info(f"📂 Connecting to ChromaDB at: {chromadb_path}")
         logger.info(f"🗂️ Looking for collection: '{settings.chromadb_collection_name}'")
         
-        # Initialize ChromaDB client
-        client = chromadb.PersistentClient(path=str(chromadb_path))
+        # Reuse the process-wide ChromaDB client
+        client = get_chroma_client()
         
         # List all collections to debug
         all_collections = client.list_collections()
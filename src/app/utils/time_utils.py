@@ -0,0 +1,14 @@
+import time
+from datetime import datetime
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def _iso_second(epoch_second: int) -> str:
+    """Local ISO-8601 string for a whole second; consecutive calls within a second hit the cache"""
+    return datetime.fromtimestamp(epoch_second).isoformat()
+
+def iso_now() -> str:
+    """Current local time in datetime.now().isoformat() format, without building a datetime per call"""
+    now = time.time()
+    epoch_second = int(now)
+    return f"{_iso_second(epoch_second)}.{int((now - epoch_second) * 1_000_000):06d}"